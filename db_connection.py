@@ -5,9 +5,19 @@
 Перед использованием укажите корректные параметры соединения в DB_CONFIG.
 """
 
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
 import mysql.connector
-from mysql.connector import MySQLConnection
-from typing import Any, Dict, List, Optional, Tuple
+from mysql.connector import MySQLConnection, errorcode
+from mysql.connector.pooling import MySQLConnectionPool
 
 
 DB_CONFIG: Dict[str, Any] = {
@@ -18,10 +28,266 @@ DB_CONFIG: Dict[str, Any] = {
     "auth_plugin": "mysql_native_password",
 }
 
+# C-расширение протокола (есть в колёсах mysql-connector-python для большинства платформ):
+# строки результата разбираются в C через libmysqlclient, как в mysqlclient (MySQLdb),
+# но при этом остаются пул, prepared-курсоры и остальной API mysql.connector.
+# Включаем его, только если оно загрузилось: use_pure=False без расширения даёт ImportError.
+if mysql.connector.HAVE_CEXT:
+    DB_CONFIG["use_pure"] = False
+
+# Если сервер на этой же машине, подключаемся через unix-сокет, минуя TCP.
+# Путь можно переопределить переменной окружения MYSQL_SOCK.
+_MYSQL_SOCK = os.environ.get("MYSQL_SOCK", "/var/run/mysqld/mysqld.sock")
+if DB_CONFIG["host"] in ("localhost", "127.0.0.1") and os.path.exists(_MYSQL_SOCK):
+    DB_CONFIG["unix_socket"] = _MYSQL_SOCK
+else:
+    # По сети сжимаем трафик: списки заявок — широкие строки с кириллицей
+    DB_CONFIG["compress"] = True
+
+
+# Кэши справочников {название: id}. Записи в этих таблицах не меняются при работе
+# приложения, поэтому id достаточно получить из БД один раз за процесс.
+_STATUS_CACHE: Dict[str, int] = {}
+_ROLE_CACHE: Dict[str, int] = {}
+_EQTYPE_CACHE: Dict[str, int] = {}
+# {фамилия или логин: user_id}; хранятся только найденные пользователи,
+# чтобы добавленный позже мастер находился без перезапуска.
+_USER_CACHE: Dict[str, int] = {}
+
+# Размер пула соединений (mysql.connector допускает не более 32).
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+
+_POOL: Optional[MySQLConnectionPool] = None
+# PID процесса, создавшего пул: сокеты нельзя делить между родителем и потомком после fork.
+_POOL_PID = 0
+
+# Подготовленные курсоры: {соединение пула: (connection_id, {текст запроса: курсор})}.
+# Ключ — само соединение, а не его connection_id: пул переподключает соединение на месте,
+# и записи прежних сессий иначе копились бы до конца процесса.
+_PREPARED: "weakref.WeakKeyDictionary[Any, Tuple[int, Dict[str, Any]]]" = weakref.WeakKeyDictionary()
+
+# Кэш результатов тяжёлых запросов списка заявок: {(функция, аргументы): (версия, время, строки)}.
+# Любая запись в заявки увеличивает _QVERSION, и старые записи кэша больше не используются.
+# TTL ограничивает устаревание из-за изменений, сделанных другими процессами.
+_QCACHE: Dict[Tuple[Any, ...], Tuple[int, float, List[Dict[str, Any]]]] = {}
+_QVERSION = 0
+QUERY_CACHE_TTL = 5.0
+
+# LRU-кэш истории по заявке (комментарии, вложения): {(раздел, request_id): (время, строки)}.
+# Сбрасывается точечно при добавлении комментария/вложения к этой заявке.
+_LRU: "OrderedDict[Tuple[str, int], Tuple[float, Tuple[Dict[str, Any], ...]]]" = OrderedDict()
+LRU_CACHE_SIZE = 64
+# История заявки читается и из фоновых потоков GUI, поэтому _LRU меняется только под замком.
+_LRU_LOCK = threading.Lock()
+# Счётчик сбросов _LRU: чтение, начатое до _invalidate, не сохраняет в кэш устаревший результат.
+_LRU_GENERATION = 0
+_RequestRowsFunc = Callable[[int], List[Dict[str, Any]]]
+
+# Сколько строк отправлять в одном многострочном INSERT (executemany).
+BULK_CHUNK_SIZE = 500
+
+
+def _get_pool() -> MySQLConnectionPool:
+    """
+    Пул соединений создаётся один раз при первом обращении, а не при импорте:
+    иначе init_db_from_sql нельзя было бы вызвать до создания базы.
+    В дочернем процессе (fork) пул родителя не используется — создаётся свой.
+    """
+    global _POOL, _POOL_PID
+    if _POOL is None or _POOL_PID != os.getpid():
+        _PREPARED.clear()
+        # Сессию при возврате в пул не сбрасываем, иначе сервер удалит подготовленные
+        # запросы (см. _exec_prepared). Чтобы чтение не видело устаревший снимок
+        # данных, соединения работают в autocommit, а запись явно открывает транзакцию.
+        _POOL = MySQLConnectionPool(
+            pool_name="sc",
+            pool_size=DB_POOL_SIZE,
+            pool_reset_session=False,
+            autocommit=True,
+            **DB_CONFIG,
+        )
+        _POOL_PID = os.getpid()
+    return _POOL
+
 
 def get_connection() -> MySQLConnection:
-    """Создаёт и возвращает подключение к БД."""
-    return mysql.connector.connect(**DB_CONFIG)
+    """
+    Берёт подключение к БД из пула.
+    close() у такого подключения не рвёт соединение, а возвращает его в пул.
+    """
+    return _get_pool().get_connection()
+
+
+@contextmanager
+def _connection() -> Iterator[MySQLConnection]:
+    """Берёт соединение из пула и гарантированно возвращает его, даже при ошибке."""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _cursor(dictionary: bool = False) -> Iterator[Tuple[MySQLConnection, Any]]:
+    """
+    Выдаёт пару (conn, cur) для чтения, без commit.
+    Курсор и соединение закрываются (соединение возвращается в пул) даже при ошибке.
+    """
+    with _connection() as conn:
+        cur = conn.cursor(dictionary=dictionary)
+        try:
+            yield conn, cur
+        finally:
+            cur.close()
+
+
+@contextmanager
+def _conn_cursor(dictionary: bool = False) -> Iterator[Tuple[MySQLConnection, Any]]:
+    """
+    То же, что _cursor, но для записи: при успешном выходе из блока делает commit,
+    при исключении — rollback, чтобы в пул не вернулось соединение с открытой транзакцией.
+    """
+    with _cursor(dictionary=dictionary) as (conn, cur):
+        conn.start_transaction()
+        try:
+            yield conn, cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # id, добавленные в кэш внутри отменённой транзакции, могли не сохраниться
+            _clear_lookup_caches()
+            raise
+
+
+def _exec_prepared(conn: MySQLConnection, sql: str, params: Tuple[Any, ...] = ()) -> Any:
+    """
+    Выполнить статический запрос через подготовленный (prepared) курсор.
+    Курсоры хранятся отдельно для каждого соединения пула, поэтому сервер разбирает
+    текст запроса один раз на соединение, а дальше передаются только параметры.
+    Результат нужно дочитать (fetchall) до следующего запроса в этом соединении.
+    """
+    # get_connection каждый раз отдаёт новую обёртку PooledMySQLConnection над одним
+    # из соединений пула; кэш привязан к самому соединению
+    raw = getattr(conn, "_cnx", conn)
+    entry = _PREPARED.get(raw)
+    if entry is None or entry[0] != conn.connection_id:
+        # соединение переподключилось: запросы, подготовленные в прежней сессии, сервер уже удалил
+        entry = _PREPARED[raw] = (conn.connection_id, {})
+    statements = entry[1]
+    cur = statements.get(sql)
+    if cur is None:
+        cur = statements[sql] = conn.cursor(prepared=True)
+    cur.execute(sql, params)
+    return cur
+
+
+def _fetch_dicts(cur: Any) -> List[Dict[str, Any]]:
+    """
+    Дочитать результат курсора в виде списка словарей {колонка: значение}.
+    Быстрее, чем cursor(dictionary=True): имена колонок берутся один раз на весь результат.
+    """
+    names = cur.column_names
+    make_dict, zip_row = dict, zip
+    return [make_dict(zip_row(names, row)) for row in cur.fetchall()]
+
+
+def _cached_query(func: Callable[..., List[Dict[str, Any]]]) -> Callable[..., List[Dict[str, Any]]]:
+    """
+    Декоратор для функций чтения списка заявок: повторный вызов с теми же аргументами
+    отдаёт сохранённый результат, пока не было записи и не истёк QUERY_CACHE_TTL.
+    Возвращаются копии словарей, чтобы изменения на стороне GUI не портили кэш.
+    """
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        key = (func.__name__,) + args + tuple(sorted(kwargs.items()))
+        now = time.monotonic()
+        entry = _QCACHE.get(key)
+        if entry is not None and entry[0] == _QVERSION and now - entry[1] < QUERY_CACHE_TTL:
+            rows = entry[2]
+        else:
+            # версию запоминаем до запроса: если запись случится во время чтения,
+            # сохранённый результат сразу окажется устаревшим
+            version = _QVERSION
+            rows = func(*args, **kwargs)
+            _QCACHE[key] = (version, now, rows)
+        return [dict(row) for row in rows]
+
+    return wrapper
+
+
+def _invalidates_queries(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Декоратор для функций записи: после вызова сбрасывает кэш _cached_query."""
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        global _QVERSION
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _QVERSION += 1
+            _QCACHE.clear()
+
+    return wrapper
+
+
+def _memoized_query(bucket: str) -> Callable[[_RequestRowsFunc], _RequestRowsFunc]:
+    """
+    Декоратор для чтения данных одной заявки (request_id — единственный аргумент).
+    Результат хранится в _LRU под ключом (bucket, request_id) до вызова _invalidate
+    для этой заявки или истечения QUERY_CACHE_TTL.
+    """
+    def decorator(func: _RequestRowsFunc) -> _RequestRowsFunc:
+        @wraps(func)
+        def wrapper(request_id: int) -> List[Dict[str, Any]]:
+            key = (bucket, request_id)
+            now = time.monotonic()
+            with _LRU_LOCK:
+                entry = _LRU.get(key)
+                if entry is not None and now - entry[0] < QUERY_CACHE_TTL:
+                    _LRU.move_to_end(key)
+                generation = _LRU_GENERATION
+            if entry is not None and now - entry[0] < QUERY_CACHE_TTL:
+                rows = entry[1]
+            else:
+                # сам запрос выполняется без замка, чтобы не блокировать другие потоки
+                rows = tuple(func(request_id))
+                with _LRU_LOCK:
+                    if generation != _LRU_GENERATION:
+                        # во время чтения был _invalidate — результат мог устареть
+                        return [dict(row) for row in rows]
+                    _LRU[key] = (now, rows)
+                    _LRU.move_to_end(key)
+                    if len(_LRU) > LRU_CACHE_SIZE:
+                        _LRU.popitem(last=False)
+            return [dict(row) for row in rows]
+
+        return wrapper
+
+    return decorator
+
+
+def _invalidate(bucket: str, request_id: int) -> None:
+    """Убрать из _LRU закэшированные данные раздела bucket по заявке."""
+    global _LRU_GENERATION
+    with _LRU_LOCK:
+        _LRU_GENERATION += 1
+        _LRU.pop((bucket, request_id), None)
+
+
+def _clear_lookup_caches() -> None:
+    """Сбросить кэши id статусов, ролей, типов оборудования и пользователей."""
+    _STATUS_CACHE.clear()
+    _ROLE_CACHE.clear()
+    _EQTYPE_CACHE.clear()
+    _USER_CACHE.clear()
+
+
+def cache_clear() -> None:
+    """
+    Сбросить кэши справочников.
+    Нужен, если статусы или пользователи изменены в БД в обход приложения.
+    """
+    _clear_lookup_caches()
 
 
 def init_db_from_sql(sql_file: str = "service_center.sql") -> None:
@@ -30,137 +296,253 @@ def init_db_from_sql(sql_file: str = "service_center.sql") -> None:
     Запускается вручную при первом развёртывании.
     """
     with open(sql_file, "r", encoding="utf-8") as f:
-        sql = f.read()
-
-    # В MySQL удобно выполнять скрипт по частям, разделённым ;
-    statements = [s.strip() for s in sql.split(";") if s.strip()]
-
-    conn = mysql.connector.connect(
-        host=DB_CONFIG["host"],
-        user=DB_CONFIG["user"],
-        password=DB_CONFIG["password"],
-        auth_plugin=DB_CONFIG.get("auth_plugin", "mysql_native_password"),
-    )
-    cur = conn.cursor()
-    for stmt in statements:
-        cur.execute(stmt)
-    conn.commit()
-    cur.close()
-    conn.close()
+        script = f.read()
+
+    # База ещё может не существовать, поэтому подключаемся без database
+    conn = mysql.connector.connect(**{k: v for k, v in DB_CONFIG.items() if k != "database"})
+    try:
+        cur = conn.cursor()
+        try:
+            # Скрипт уходит на сервер целиком (multi-statement, mysql-connector-python 9.2+):
+            # драйвер сам разбирает границы операторов, в том числе ; внутри строковых литералов.
+            # Результаты всех операторов нужно дочитать, иначе следующий не выполнится.
+            cur.execute(script)
+            while True:
+                if cur.with_rows:
+                    cur.fetchall()
+                if not cur.nextset():
+                    break
+            # DDL в MySQL фиксируется сразу, а INSERT-ы наполнения — одним commit
+            conn.commit()
+        finally:
+            cur.close()
+    finally:
+        conn.close()
 
 
+# Индексы и вычисляемые колонки, добавленные в service_center.sql после первых развёртываний.
+# ensure_indexes() докатывает их на уже созданную БД.
+_SCHEMA_UPGRADES: List[str] = [
+    """
+    ALTER TABLE requests ADD COLUMN priority_rank TINYINT AS (
+      CASE priority
+        WHEN 'Высокий' THEN 1
+        WHEN 'Средний' THEN 2
+        WHEN 'Низкий'  THEN 3
+        ELSE 4
+      END
+    ) STORED
+    """,
+    "ALTER TABLE requests ADD INDEX ix_master_pri (master_id, priority_rank, start_date, request_id)",
+    "ALTER TABLE requests ADD INDEX ix_req_client (client_id, start_date, request_id)",
+    "ALTER TABLE requests ADD INDEX ix_notify (notify_client, client_id, request_id)",
+    """
+    ALTER TABLE requests ADD COLUMN problem_key VARCHAR(255)
+      AS (LEFT(LOWER(TRIM(problem_description)), 255)) STORED
+    """,
+    "ALTER TABLE requests ADD INDEX ix_req_dup (client_id, problem_key)",
+    "ALTER TABLE users ADD UNIQUE KEY uq_users_phone_role (phone, role_id)",
+    "ALTER TABLE equipment ADD UNIQUE KEY uq_equipment_type_model (type_id, model)",
+    "ALTER TABLE comments ADD INDEX ix_comments_req (request_id, created_at, comment_id)",
+    "ALTER TABLE attachments ADD INDEX ix_attach_req (request_id, uploaded_at, attachment_id)",
+    "ALTER TABLE requests ADD FULLTEXT ft_requests_text (problem_description, priority, ticket_type)",
+    "ALTER TABLE users ADD FULLTEXT ft_users_name_phone (lastname, firstname, surname, phone)",
+    "ALTER TABLE equipment ADD FULLTEXT ft_equipment_model (model)",
+    "ALTER TABLE equipment_types ADD FULLTEXT ft_equipment_types_name (type_name)",
+    "ALTER TABLE request_statuses ADD FULLTEXT ft_request_statuses_name (status_name)",
+]
+
+
+def ensure_indexes() -> List[str]:
+    """
+    Добавить недостающие индексы (и колонки priority_rank, problem_key) в существующую БД.
+    Вызывается один раз при старте приложения; уже существующие объекты пропускаются,
+    поэтому повторный запуск безопасен и в MySQL, и в MariaDB.
+    Если в таблице уже есть дубликаты, уникальный ключ не создаётся (ER_DUP_ENTRY),
+    остальные изменения выполняются. Возвращает имена таких ключей — дубликаты нужно убрать вручную,
+    после чего ключ добавится при следующем запуске.
+    """
+    skipped: List[str] = []
+    with _cursor() as (_, cur):
+        for ddl in _SCHEMA_UPGRADES:
+            try:
+                cur.execute(ddl)
+            except mysql.connector.Error as exc:
+                if exc.errno == errorcode.ER_DUP_ENTRY:
+                    match = re.search(r"UNIQUE KEY (\w+)", ddl)
+                    skipped.append(match.group(1) if match else ddl.strip())
+                elif exc.errno not in (errorcode.ER_DUP_KEYNAME, errorcode.ER_DUP_FIELDNAME):
+                    raise
+    return skipped
+
+
+@_cached_query
 def fetch_client_requests(phone: str) -> List[Dict[str, Any]]:
     """
     Получить список заявок по номеру телефона клиента.
     Возвращает словари с основной информацией.
     """
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-
-    query = """
-        SELECT r.request_id,
-               r.start_date,
-               et.type_name    AS equipment_type,
-               e.model         AS model,
-               r.problem_description,
-               rs.status_name  AS status,
-               r.completion_date,
-               r.report,
-               r.notify_client,
-               r.client_id,
-               u.lastname,
-               u.firstname,
-               u.surname
-        FROM requests r
-        JOIN users u             ON r.client_id = u.user_id
-        JOIN equipment e         ON r.equipment_id = e.equipment_id
-        JOIN equipment_types et  ON e.type_id = et.type_id
-        JOIN request_statuses rs ON r.status_id = rs.status_id
-        WHERE u.phone = %s
-        ORDER BY r.start_date DESC, r.request_id DESC;
-    """
-    cur.execute(query, (phone,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with _connection() as conn:
+        # ФИО клиента одинаково для всех его заявок, поэтому читаем его один раз,
+        # а заявки фильтруем по индексированному client_id
+        users = _fetch_dicts(_exec_prepared(
+            conn,
+            "SELECT user_id, lastname, firstname, surname FROM users WHERE phone = %s",
+            (phone,),
+        ))
+        query = """
+            SELECT r.request_id,
+                   r.start_date,
+                   et.type_name    AS equipment_type,
+                   e.model         AS model,
+                   r.problem_description,
+                   rs.status_name  AS status,
+                   r.completion_date,
+                   r.report,
+                   r.notify_client,
+                   r.client_id
+            FROM requests r
+            JOIN equipment e         ON r.equipment_id = e.equipment_id
+            JOIN equipment_types et  ON e.type_id = et.type_id
+            JOIN request_statuses rs ON r.status_id = rs.status_id
+            WHERE r.client_id = %s
+            ORDER BY r.start_date DESC, r.request_id DESC
+        """
+        rows: List[Dict[str, Any]] = []
+        for user in users:
+            names = {"lastname": user["lastname"], "firstname": user["firstname"], "surname": user["surname"]}
+            for row in _fetch_dicts(_exec_prepared(conn, query, (user["user_id"],))):
+                row.update(names)
+                rows.append(row)
+    if len(users) > 1:
+        # телефон может принадлежать нескольким пользователям с разными ролями
+        rows.sort(key=lambda r: (r["start_date"], r["request_id"]), reverse=True)
     return rows
 
 
+def fetch_pending_notifications() -> List[Dict[str, Any]]:
+    """
+    Заявки, по которым клиенту нужно отправить оповещение (notify_client = 1).
+    Запрос целиком обслуживается индексом ix_notify, без чтения самой таблицы.
+    """
+    with _connection() as conn:
+        query = """
+            SELECT request_id, client_id
+            FROM requests
+            WHERE notify_client = 1
+            ORDER BY client_id, request_id
+        """
+        rows = _fetch_dicts(_exec_prepared(conn, query))
+    return rows
+
+
+@_memoized_query("comments")
 def fetch_request_comments(request_id: int) -> List[Dict[str, Any]]:
     """Получить историю комментариев по заявке."""
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    query = """
-        SELECT c.comment_id,
-               c.message,
-               c.created_at,
-               u.firstname,
-               u.lastname,
-               r.role_name
-        FROM comments c
-        JOIN users u ON c.user_id = u.user_id
-        JOIN roles r ON u.role_id = r.role_id
-        WHERE c.request_id = %s
-        ORDER BY c.created_at ASC, c.comment_id ASC;
-    """
-    cur.execute(query, (request_id,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with _connection() as conn:
+        query = """
+            SELECT c.comment_id,
+                   c.message,
+                   c.created_at,
+                   u.firstname,
+                   u.lastname,
+                   r.role_name
+            FROM comments c
+            JOIN users u ON c.user_id = u.user_id
+            JOIN roles r ON u.role_id = r.role_id
+            WHERE c.request_id = %s
+            ORDER BY c.created_at ASC, c.comment_id ASC
+        """
+        rows = _fetch_dicts(_exec_prepared(conn, query, (request_id,)))
     return rows
 
 
+def add_comments_bulk(comments: List[Tuple[int, int, str]]) -> None:
+    """
+    Добавить несколько комментариев одной транзакцией.
+    comments — список кортежей (request_id, user_id, message).
+    """
+    with _conn_cursor() as (_, cur):
+        _insert_comments(cur, comments)
+    for request_id in {request_id for request_id, _, _ in comments}:
+        _invalidate("comments", request_id)
+
+
+def _insert_comments(cur: Any, comments: List[Tuple[int, int, str]]) -> None:
+    """INSERT комментариев (request_id, user_id, message) в транзакции курсора cur."""
+    rows = [(message, user_id, request_id) for request_id, user_id, message in comments]
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        cur.executemany(
+            "INSERT INTO comments (message, user_id, request_id) VALUES (%s, %s, %s)",
+            rows[start:start + BULK_CHUNK_SIZE],
+        )
+
+
 def add_comment(request_id: int, user_id: int, message: str) -> None:
     """Добавить комментарий к заявке."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO comments (message, user_id, request_id) VALUES (%s, %s, %s)",
-        (message, user_id, request_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    add_comments_bulk([(request_id, user_id, message)])
 
 
-def add_attachment(request_id: int, user_id: Optional[int], file_path: str, description: str = "") -> None:
-    """Добавить вложение к заявке."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO attachments (request_id, user_id, file_path, description)
-        VALUES (%s, %s, %s, %s)
-        """,
-        (request_id, user_id, file_path, description),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+def add_attachments_bulk(attachments: List[Tuple[int, Optional[int], str, str]]) -> None:
+    """
+    Добавить несколько вложений одной транзакцией.
+    attachments — список кортежей (request_id, user_id, file_path, description).
+    """
+    with _conn_cursor() as (_, cur):
+        _insert_attachments(cur, attachments)
+    for request_id in {attachment[0] for attachment in attachments}:
+        _invalidate("attachments", request_id)
+
+
+def _insert_attachments(cur: Any, attachments: List[Tuple[int, Optional[int], str, str]]) -> None:
+    """INSERT вложений (request_id, user_id, file_path, description) в транзакции курсора cur."""
+    for start in range(0, len(attachments), BULK_CHUNK_SIZE):
+        cur.executemany(
+            """
+            INSERT INTO attachments (request_id, user_id, file_path, description)
+            VALUES (%s, %s, %s, %s)
+            """,
+            attachments[start:start + BULK_CHUNK_SIZE],
+        )
 
 
+def add_attachment(
+    request_id: int,
+    user_id: Optional[int],
+    file_path: str,
+    description: str = "",
+    message: Optional[str] = None,
+) -> None:
+    """
+    Добавить вложение к заявке. В БД хранится только путь, сам файл не читается.
+    Если передан message, комментарий от user_id добавляется в той же транзакции.
+    """
+    with _conn_cursor() as (_, cur):
+        _insert_attachments(cur, [(request_id, user_id, file_path, description)])
+        if user_id and message:
+            _insert_comments(cur, [(request_id, user_id, message)])
+    _invalidate("attachments", request_id)
+    if user_id and message:
+        _invalidate("comments", request_id)
+
+
+@_memoized_query("attachments")
 def fetch_attachments(request_id: int) -> List[Dict[str, Any]]:
     """Получить список вложений по заявке."""
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
+    with _connection() as conn:
+        query = """
+            SELECT a.attachment_id,
+                   a.file_path,
+                   a.description,
+                   a.uploaded_at,
+                   u.firstname,
+                   u.lastname
+            FROM attachments a
+            LEFT JOIN users u ON a.user_id = u.user_id
+            WHERE a.request_id = %s
+            ORDER BY a.uploaded_at ASC, a.attachment_id ASC
         """
-        SELECT a.attachment_id,
-               a.file_path,
-               a.description,
-               a.uploaded_at,
-               u.firstname,
-               u.lastname
-        FROM attachments a
-        LEFT JOIN users u ON a.user_id = u.user_id
-        WHERE a.request_id = %s
-        ORDER BY a.uploaded_at ASC, a.attachment_id ASC
-        """,
-        (request_id,),
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+        rows = _fetch_dicts(_exec_prepared(conn, query, (request_id,)))
     return rows
 
 
@@ -171,34 +553,59 @@ def update_request_status_and_report(
     notify_client: bool = False,
 ) -> None:
     """Обновить статус заявки, отчёт и флаг оповещения клиента."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE requests
-        SET status_id = %s,
-            report = COALESCE(%s, report),
-            notify_client = %s
-        WHERE request_id = %s
-        """,
-        (status_id, report, int(bool(notify_client)), request_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    save_status_with_comment(request_id, status_id, report, notify_client)
 
 
-def set_request_requires_parts(request_id: int, requires_parts: bool = True) -> None:
-    """Отметить, что по заявке требуется заказ запчастей."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE requests SET requires_parts = %s WHERE request_id = %s",
-        (int(bool(requires_parts)), request_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+@_invalidates_queries
+def save_status_with_comment(
+    request_id: int,
+    status_id: int,
+    report: Optional[str] = None,
+    notify_client: bool = False,
+    user_id: Optional[int] = None,
+    message: Optional[str] = None,
+) -> None:
+    """
+    То же, что update_request_status_and_report, и в той же транзакции —
+    комментарий user_id к заявке (если переданы user_id и message).
+    """
+    with _conn_cursor() as (_, cur):
+        cur.execute(
+            """
+            UPDATE requests
+            SET status_id = %s,
+                report = COALESCE(%s, report),
+                notify_client = %s
+            WHERE request_id = %s
+            """,
+            (status_id, report, int(bool(notify_client)), request_id),
+        )
+        if user_id and message:
+            _insert_comments(cur, [(request_id, user_id, message)])
+    if user_id and message:
+        _invalidate("comments", request_id)
+
+
+@_invalidates_queries
+def set_request_requires_parts(
+    request_id: int,
+    requires_parts: bool = True,
+    user_id: Optional[int] = None,
+    message: Optional[str] = None,
+) -> None:
+    """
+    Отметить, что по заявке требуется заказ запчастей.
+    Если переданы user_id и message, комментарий добавляется в той же транзакции.
+    """
+    with _conn_cursor() as (_, cur):
+        cur.execute(
+            "UPDATE requests SET requires_parts = %s WHERE request_id = %s",
+            (int(bool(requires_parts)), request_id),
+        )
+        if user_id and message:
+            _insert_comments(cur, [(request_id, user_id, message)])
+    if user_id and message:
+        _invalidate("comments", request_id)
 
 
 def _split_full_name(full_name: str) -> Tuple[str, str, str]:
@@ -216,115 +623,105 @@ def _split_full_name(full_name: str) -> Tuple[str, str, str]:
     return parts[0], parts[1], " ".join(parts[2:])
 
 
+def _get_role_id(cur: Any, role_name: str) -> int:
+    """Вспомогательная функция: получить ID роли по имени (создаёт при необходимости)."""
+    role_id = _ROLE_CACHE.get(role_name)
+    if role_id is not None:
+        return role_id
+    cur.execute(
+        """
+        INSERT INTO roles (role_name) VALUES (%s)
+        ON DUPLICATE KEY UPDATE role_id = LAST_INSERT_ID(role_id)
+        """,
+        (role_name,),
+    )
+    role_id = cur.lastrowid
+    _ROLE_CACHE[role_name] = role_id
+    return role_id
+
+
 def get_or_create_client(full_name: str, phone: str) -> int:
     """
     Найти клиента по телефону с ролью 'Заказчик' или создать нового.
     Возвращает user_id.
     """
-    conn = get_connection()
-    cur = conn.cursor()
+    with _conn_cursor() as (_, cur):
+        role_id = _get_role_id(cur, "Заказчик")
+
+        # Создать заказчика; если он уже есть (UNIQUE (phone, role_id)), данные не меняются,
+        # а LAST_INSERT_ID(user_id) возвращает id существующей записи
+        lastname, firstname, surname = _split_full_name(full_name)
+        login = f"client_{phone}"
+        password = "client"  # учебный проект, без хеширования
+        cur.execute(
+            """
+            INSERT INTO users (lastname, firstname, surname, phone, login, password, role_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE user_id = LAST_INSERT_ID(user_id)
+            """,
+            (lastname, firstname, surname, phone, login, password, role_id),
+        )
+        user_id = cur.lastrowid
+    return user_id
 
-    # Найти роль "Заказчик"
-    cur.execute("SELECT role_id FROM roles WHERE role_name = %s", ("Заказчик",))
-    row = cur.fetchone()
-    if not row:
-        # Создадим роль при необходимости
-        cur.execute("INSERT INTO roles (role_name) VALUES (%s)", ("Заказчик",))
-        role_id = cur.lastrowid
-    else:
-        role_id = row[0]
-
-    # Попробовать найти существующего пользователя
-    cur.execute(
-        "SELECT user_id FROM users WHERE phone = %s AND role_id = %s",
-        (phone, role_id),
-    )
-    row = cur.fetchone()
-    if row:
-        user_id = row[0]
-        cur.close()
-        conn.close()
-        return user_id
 
-    # Создать нового заказчика
-    lastname, firstname, surname = _split_full_name(full_name)
-    login = f"client_{phone}"
-    password = "client"  # учебный проект, без хеширования
+def _get_equipment_type_id(cur: Any, type_name: str) -> int:
+    """Вспомогательная функция: получить ID типа оборудования по имени (создаёт при необходимости)."""
+    type_id = _EQTYPE_CACHE.get(type_name)
+    if type_id is not None:
+        return type_id
     cur.execute(
         """
-        INSERT INTO users (lastname, firstname, surname, phone, login, password, role_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        INSERT INTO equipment_types (type_name) VALUES (%s)
+        ON DUPLICATE KEY UPDATE type_id = LAST_INSERT_ID(type_id)
         """,
-        (lastname, firstname, surname, phone, login, password, role_id),
+        (type_name,),
     )
-    user_id = cur.lastrowid
-    conn.commit()
-    cur.close()
-    conn.close()
-    return user_id
+    type_id = cur.lastrowid
+    _EQTYPE_CACHE[type_name] = type_id
+    return type_id
 
 
 def get_or_create_equipment(type_name: str, model: str) -> int:
     """Найти или создать запись об оборудовании по типу и модели. Возвращает equipment_id."""
-    conn = get_connection()
-    cur = conn.cursor()
+    with _conn_cursor() as (_, cur):
+        type_id = _get_equipment_type_id(cur, type_name)
+        equipment_id = _get_equipment_id(cur, type_id, model)
+    return equipment_id
 
-    # Тип оборудования
-    cur.execute(
-        "SELECT type_id FROM equipment_types WHERE type_name = %s",
-        (type_name,),
-    )
-    row = cur.fetchone()
-    if row:
-        type_id = row[0]
-    else:
-        cur.execute(
-            "INSERT INTO equipment_types (type_name) VALUES (%s)",
-            (type_name,),
-        )
-        type_id = cur.lastrowid
 
-    # Конкретное устройство (тип + модель)
+def _get_equipment_id(cur: Any, type_id: int, model: str) -> int:
+    """Найти или создать конкретное устройство (тип + модель, UNIQUE (type_id, model)) в транзакции cur."""
     cur.execute(
-        "SELECT equipment_id FROM equipment WHERE type_id = %s AND model = %s",
+        """
+        INSERT INTO equipment (type_id, model) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE equipment_id = LAST_INSERT_ID(equipment_id)
+        """,
         (type_id, model),
     )
-    row = cur.fetchone()
-    if row:
-        equipment_id = row[0]
-    else:
-        cur.execute(
-            "INSERT INTO equipment (type_id, model) VALUES (%s, %s)",
-            (type_id, model),
-        )
-        equipment_id = cur.lastrowid
-
-    conn.commit()
-    cur.close()
-    conn.close()
-    return equipment_id
+    return cur.lastrowid
 
 
-def _get_status_id(status_name: str) -> int:
-    """Вспомогательная функция: получить ID статуса по имени (создаёт при необходимости)."""
-    conn = get_connection()
-    cur = conn.cursor()
+def _get_status_id(status_name: str, cur: Any = None) -> int:
+    """
+    Вспомогательная функция: получить ID статуса по имени (создаёт при необходимости).
+    Если передан cur, запрос выполняется в его соединении и транзакции.
+    """
+    status_id = _STATUS_CACHE.get(status_name)
+    if status_id is not None:
+        return status_id
+    if cur is None:
+        with _conn_cursor() as (_, own_cur):
+            return _get_status_id(status_name, own_cur)
     cur.execute(
-        "SELECT status_id FROM request_statuses WHERE status_name = %s",
+        """
+        INSERT INTO request_statuses (status_name) VALUES (%s)
+        ON DUPLICATE KEY UPDATE status_id = LAST_INSERT_ID(status_id)
+        """,
         (status_name,),
     )
-    row = cur.fetchone()
-    if row:
-        status_id = row[0]
-    else:
-        cur.execute(
-            "INSERT INTO request_statuses (status_name) VALUES (%s)",
-            (status_name,),
-        )
-        status_id = cur.lastrowid
-        conn.commit()
-    cur.close()
-    conn.close()
+    status_id = cur.lastrowid
+    _STATUS_CACHE[status_name] = status_id
     return status_id
 
 
@@ -336,6 +733,7 @@ def get_status_id(status_name: str) -> int:
     return _get_status_id(status_name)
 
 
+@_invalidates_queries
 def create_request(client_id: int, equipment_id: int, problem_description: str) -> int:
     """
     Создать новую заявку от клиента:
@@ -343,23 +741,21 @@ def create_request(client_id: int, equipment_id: int, problem_description: str)
     - дата начала: текущая дата БД
     Возвращает request_id.
     """
-    status_id = _get_status_id("Новая заявка")
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO requests (start_date, equipment_id, problem_description, status_id, client_id)
-        VALUES (CURRENT_DATE, %s, %s, %s, %s)
-        """,
-        (equipment_id, problem_description, status_id, client_id),
-    )
-    request_id = cur.lastrowid
-    conn.commit()
-    cur.close()
-    conn.close()
+    with _conn_cursor() as (conn, cur):
+        status_id = _get_status_id("Новая заявка", cur)
+        insert = _exec_prepared(
+            conn,
+            """
+            INSERT INTO requests (start_date, equipment_id, problem_description, status_id, client_id)
+            VALUES (CURRENT_DATE, %s, %s, %s, %s)
+            """,
+            (equipment_id, problem_description, status_id, client_id),
+        )
+        request_id = insert.lastrowid
     return request_id
 
 
+@_invalidates_queries
 def update_request_client_side(
     request_id: int,
     new_problem_description: Optional[str] = None,
@@ -367,122 +763,145 @@ def update_request_client_side(
 ) -> None:
     """
     Обновить описание проблемы и/или модель устройства по заявке со стороны клиента.
-    Внимание: изменение модели изменяет запись в таблице equipment для данной заявки.
+    Изменение модели переводит заявку на запись equipment с тем же типом и новой моделью
+    (находит или создаёт её); сама запись equipment не меняется — её могут использовать другие заявки.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    if new_problem_description:
+    if not (new_problem_description or new_model):
+        return
+    with _conn_cursor() as (_, cur):
+        equipment_id = None
+        if new_model:
+            cur.execute(
+                """
+                SELECT e.type_id
+                FROM requests r
+                JOIN equipment e ON r.equipment_id = e.equipment_id
+                WHERE r.request_id = %s
+                """,
+                (request_id,),
+            )
+            row = cur.fetchone()
+            if row is None:
+                return
+            equipment_id = _get_equipment_id(cur, row[0], new_model)
+        # NULL означает «не менять»
         cur.execute(
-            "UPDATE requests SET problem_description = %s WHERE request_id = %s",
-            (new_problem_description, request_id),
+            """
+            UPDATE requests
+            SET problem_description = COALESCE(%s, problem_description),
+                equipment_id = COALESCE(%s, equipment_id)
+            WHERE request_id = %s
+            """,
+            (new_problem_description or None, equipment_id, request_id),
         )
 
-    if new_model:
-        # Найти оборудование, связанное с заявкой, и обновить модель
-        cur.execute(
-            "SELECT equipment_id FROM requests WHERE request_id = %s",
-            (request_id,),
-        )
-        row = cur.fetchone()
-        if row:
-            equipment_id = row[0]
-            cur.execute(
-                "UPDATE equipment SET model = %s WHERE equipment_id = %s",
-                (new_model, equipment_id),
-            )
 
-    conn.commit()
-    cur.close()
-    conn.close()
+# Общая часть запросов списка заявок для оператора (все заявки и поиск по архиву).
+_OPERATOR_REQUESTS_QUERY = """
+    SELECT
+      r.request_id,
+      r.start_date,
+      r.problem_description,
+      rs.status_name      AS status,
+      r.priority,
+      r.ticket_type,
+      r.operator_group,
+      r.responsible_operator,
+      r.observers_text,
+      r.notify_client,
+      r.requires_parts,
+      r.report,
+      c.user_id           AS client_id,
+      c.lastname          AS client_lastname,
+      c.firstname         AS client_firstname,
+      c.surname           AS client_surname,
+      c.phone             AS client_phone,
+      e.equipment_id,
+      et.type_name        AS equipment_type,
+      e.model             AS equipment_model,
+      m.user_id           AS master_id,
+      m.lastname          AS master_lastname,
+      m.firstname         AS master_firstname,
+      -- готовые строки для столбцов таблицы оператора
+      TRIM(CONCAT_WS(' ', c.lastname, c.firstname, c.surname)) AS client_fio,
+      CONCAT_WS(' ', et.type_name, e.model)                    AS equipment_str,
+      TRIM(CONCAT_WS(' ', m.lastname, m.firstname))            AS master_fio
+    FROM requests r
+    JOIN users c              ON r.client_id = c.user_id
+    JOIN equipment e          ON r.equipment_id = e.equipment_id
+    JOIN equipment_types et   ON e.type_id = et.type_id
+    JOIN request_statuses rs  ON r.status_id = rs.status_id
+    LEFT JOIN users m         ON r.master_id = m.user_id
+"""
+_OPERATOR_REQUESTS_ORDER = " ORDER BY r.start_date DESC, r.request_id DESC"
+
+# Минимальная длина слова, которое попадает в FULLTEXT-индекс InnoDB (innodb_ft_min_token_size).
+FULLTEXT_MIN_TOKEN = 3
 
+# Служебные символы булева режима MATCH ... AGAINST, их убираем из пользовательского ввода.
+_FULLTEXT_SPECIAL = re.compile(r'[+\-<>()~*"@]')
 
-def fetch_all_requests() -> List[Dict[str, Any]]:
+
+def _limit_clause(limit: Optional[int], offset: int) -> Tuple[str, Tuple[int, ...]]:
+    """LIMIT/OFFSET для постраничной выборки; limit=None — без ограничения."""
+    if limit is None:
+        return "", ()
+    return " LIMIT %s OFFSET %s", (limit, offset)
+
+
+@_cached_query
+def fetch_all_requests(limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
     """
     Получить список всех заявок с основной информацией для оператора:
     клиент, телефон, устройство, статус, приоритет, назначенный мастер.
+    limit/offset задают страницу (в порядке от новых заявок к старым).
     """
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    query = """
-        SELECT
-          r.request_id,
-          r.start_date,
-          r.problem_description,
-          rs.status_name      AS status,
-          r.priority,
-          r.ticket_type,
-          r.operator_group,
-          r.responsible_operator,
-          r.observers_text,
-          r.notify_client,
-          r.requires_parts,
-          r.report,
-          c.user_id           AS client_id,
-          c.lastname          AS client_lastname,
-          c.firstname         AS client_firstname,
-          c.surname           AS client_surname,
-          c.phone             AS client_phone,
-          e.equipment_id,
-          et.type_name        AS equipment_type,
-          e.model             AS equipment_model,
-          m.user_id           AS master_id,
-          m.lastname          AS master_lastname,
-          m.firstname         AS master_firstname
-        FROM requests r
-        JOIN users c              ON r.client_id = c.user_id
-        JOIN equipment e          ON r.equipment_id = e.equipment_id
-        JOIN equipment_types et   ON e.type_id = et.type_id
-        JOIN request_statuses rs  ON r.status_id = rs.status_id
-        LEFT JOIN users m         ON r.master_id = m.user_id
-        ORDER BY r.start_date DESC, r.request_id DESC
-    """
-    cur.execute(query)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    page, params = _limit_clause(limit, offset)
+    with _connection() as conn:
+        query = _OPERATOR_REQUESTS_QUERY + _OPERATOR_REQUESTS_ORDER + page
+        rows = _fetch_dicts(_exec_prepared(conn, query, params))
     return rows
 
 
-def search_requests(text: str) -> List[Dict[str, Any]]:
+def fetch_request(request_id: int) -> Optional[Dict[str, Any]]:
+    """Одна заявка в том же виде, что строки fetch_all_requests (или None, если её нет)."""
+    with _connection() as conn:
+        query = _OPERATOR_REQUESTS_QUERY + " WHERE r.request_id = %s"
+        rows = _fetch_dicts(_exec_prepared(conn, query, (request_id,)))
+    return rows[0] if rows else None
+
+
+def _fulltext_query(text: str) -> Optional[str]:
     """
-    Поиск заявок по различным полям для электронного архива оператора.
-    Ищем по: ID, ФИО/телефону клиента, типу/модели устройства, описанию, статусу, приоритету, типу заявки.
+    Превратить строку поиска в запрос булева режима FULLTEXT: каждое слово обязательно
+    и ищется по префиксу. Возвращает None, если хотя бы одно слово короче
+    FULLTEXT_MIN_TOKEN — такие слова не попадают в индекс.
     """
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    pattern = f"%{text.lower()}%"
-    query = """
-        SELECT
-          r.request_id,
-          r.start_date,
-          r.problem_description,
-          rs.status_name      AS status,
-          r.priority,
-          r.ticket_type,
-          r.operator_group,
-          r.responsible_operator,
-          r.observers_text,
-          r.notify_client,
-          r.requires_parts,
-          r.report,
-          c.user_id           AS client_id,
-          c.lastname          AS client_lastname,
-          c.firstname         AS client_firstname,
-          c.surname           AS client_surname,
-          c.phone             AS client_phone,
-          e.equipment_id,
-          et.type_name        AS equipment_type,
-          e.model             AS equipment_model,
-          m.user_id           AS master_id,
-          m.lastname          AS master_lastname,
-          m.firstname         AS master_firstname
-        FROM requests r
-        JOIN users c              ON r.client_id = c.user_id
-        JOIN equipment e          ON r.equipment_id = e.equipment_id
-        JOIN equipment_types et   ON e.type_id = et.type_id
-        JOIN request_statuses rs  ON r.status_id = rs.status_id
-        LEFT JOIN users m         ON r.master_id = m.user_id
+    tokens = _FULLTEXT_SPECIAL.sub(" ", text).split()
+    if not tokens or any(len(tok) < FULLTEXT_MIN_TOKEN for tok in tokens):
+        return None
+    return " ".join(f"+{tok}*" for tok in tokens)
+
+
+def _search_condition(text: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Условие WHERE и параметры для поиска по архиву.
+    Слова ищутся по FULLTEXT-индексам (по началу слова); короткие запросы — старым
+    перебором LIKE '%...%'.
+    """
+    ft_query = _fulltext_query(text)
+    if ft_query is not None:
+        where = """
+            WHERE
+              CAST(r.request_id AS CHAR) = %s OR
+              MATCH(r.problem_description, r.priority, r.ticket_type) AGAINST (%s IN BOOLEAN MODE) OR
+              MATCH(c.lastname, c.firstname, c.surname, c.phone) AGAINST (%s IN BOOLEAN MODE) OR
+              MATCH(e.model)        AGAINST (%s IN BOOLEAN MODE) OR
+              MATCH(et.type_name)   AGAINST (%s IN BOOLEAN MODE) OR
+              MATCH(rs.status_name) AGAINST (%s IN BOOLEAN MODE)
+        """
+        return where, (text.strip(),) + (ft_query,) * 5
+    where = """
         WHERE
           CAST(r.request_id AS CHAR) LIKE %s OR
           LOWER(CONCAT(c.lastname, ' ', c.firstname, ' ', c.surname)) LIKE %s OR
@@ -493,26 +912,71 @@ def search_requests(text: str) -> List[Dict[str, Any]]:
           LOWER(rs.status_name)    LIKE %s OR
           LOWER(r.priority)        LIKE %s OR
           LOWER(r.ticket_type)     LIKE %s
-        ORDER BY r.start_date DESC, r.request_id DESC
     """
-    params = (pattern,) * 9
-    cur.execute(query, params)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    return where, (f"%{text.lower()}%",) * 9
+
+
+def search_requests(text: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Поиск заявок по различным полям для электронного архива оператора.
+    Ищем по: ID, ФИО/телефону клиента, типу/модели устройства, описанию, статусу, приоритету, типу заявки.
+    limit/offset — как в fetch_all_requests.
+    """
+    where, params = _search_condition(text)
+    page, page_params = _limit_clause(limit, offset)
+    with _cursor() as (_, cur):
+        cur.execute(_OPERATOR_REQUESTS_QUERY + where + _OPERATOR_REQUESTS_ORDER + page, params + page_params)
+        rows = _fetch_dicts(cur)
     return rows
 
 
-def _get_user_id_by_master_name(name: str) -> Optional[int]:
+@contextmanager
+def _iter_rows(query: str, params: Tuple[Any, ...] = ()) -> Iterator[Iterator[Dict[str, Any]]]:
+    """
+    Выполнить запрос на небуферизованном курсоре и выдать итератор словарей.
+    Строки читаются из сокета по мере перебора, соединение занято до выхода из блока with.
+    """
+    with _cursor() as (conn, cur):
+        cur.execute(query, params)
+        names = cur.column_names
+        try:
+            yield (dict(zip(names, row)) for row in cur)
+        finally:
+            # недочитанные строки нужно забрать, иначе курсор не закроется
+            conn.consume_results()
+
+
+def iter_all_requests() -> ContextManager[Iterator[Dict[str, Any]]]:
+    """
+    Потоковый вариант fetch_all_requests для большого архива:
+        with iter_all_requests() as rows:
+            for r in rows: ...
+    В памяти одновременно держится одна строка, первая строка доступна сразу.
+    """
+    return _iter_rows(_OPERATOR_REQUESTS_QUERY + _OPERATOR_REQUESTS_ORDER)
+
+
+def iter_search_requests(text: str) -> ContextManager[Iterator[Dict[str, Any]]]:
+    """Потоковый вариант search_requests (см. iter_all_requests)."""
+    where, params = _search_condition(text)
+    return _iter_rows(_OPERATOR_REQUESTS_QUERY + where + _OPERATOR_REQUESTS_ORDER, params)
+
+
+def _get_user_id_by_master_name(name: str, cur: Any = None) -> Optional[int]:
     """
     Найти мастера по ФИО (по фамилии или логину).
     Используется при назначении мастера оператором.
+    Если передан cur, запрос выполняется в его соединении.
     """
     name = name.strip()
     if not name:
         return None
-    conn = get_connection()
-    cur = conn.cursor()
+    user_id = _USER_CACHE.get(name)
+    if user_id is not None:
+        return user_id
+    if cur is None:
+        with _cursor() as (_, own_cur):
+            return _get_user_id_by_master_name(name, own_cur)
     # Попробуем найти по фамилии, затем по логину
     cur.execute(
         """
@@ -524,9 +988,8 @@ def _get_user_id_by_master_name(name: str) -> Optional[int]:
         (name, name),
     )
     row = cur.fetchone()
-    cur.close()
-    conn.close()
     if row:
+        _USER_CACHE[name] = row[0]
         return row[0]
     return None
 
@@ -539,6 +1002,37 @@ def get_user_id_by_name_or_login(name: str) -> Optional[int]:
     return _get_user_id_by_master_name(name)
 
 
+# Поля, которые оператор может менять в заявке; i-й бит маски соответствует i-му полю.
+_OPERATOR_UPDATE_FIELDS = (
+    "operator_group",
+    "responsible_operator",
+    "observers_text",
+    "status_id",
+    "priority",
+    "ticket_type",
+    "master_id",
+)
+
+# Готовые тексты UPDATE для каждой комбинации полей: {маска: SQL}.
+_UPDATE_TEMPLATES: Dict[int, str] = {}
+
+
+def _operator_update_sql(mask: int) -> str:
+    """
+    Текст UPDATE для набора полей, заданного битовой маской.
+    Строится один раз на маску, поэтому одинаковые сохранения из GUI дают один и тот же
+    текст запроса и переиспользуют подготовленный курсор соединения.
+    """
+    sql = _UPDATE_TEMPLATES.get(mask)
+    if sql is None:
+        fields = ", ".join(
+            f"{name} = %s" for bit, name in enumerate(_OPERATOR_UPDATE_FIELDS) if mask & (1 << bit)
+        )
+        sql = _UPDATE_TEMPLATES[mask] = f"UPDATE requests SET {fields} WHERE request_id = %s"
+    return sql
+
+
+@_invalidates_queries
 def update_request_operator_side(
     request_id: int,
     operator_group: Optional[str],
@@ -553,111 +1047,109 @@ def update_request_operator_side(
     Обновление полей заявки со стороны оператора:
     группа операторов, ответственный, наблюдатели, статус, приоритет, тип, мастер.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    status_id: Optional[int] = None
-    if status_name:
-        status_id = _get_status_id(status_name)
-
-    master_id: Optional[int] = None
-    if master_name:
-        master_id = _get_user_id_by_master_name(master_name)
-
-    # Сформируем запрос динамически, обновляя только переданные поля
-    fields = []
-    params: List[Any] = []
-    if operator_group is not None:
-        fields.append("operator_group = %s")
-        params.append(operator_group)
-    if responsible_operator is not None:
-        fields.append("responsible_operator = %s")
-        params.append(responsible_operator)
-    if observers_text is not None:
-        fields.append("observers_text = %s")
-        params.append(observers_text)
-    if status_id is not None:
-        fields.append("status_id = %s")
-        params.append(status_id)
-    if priority is not None:
-        fields.append("priority = %s")
-        params.append(priority)
-    if ticket_type is not None:
-        fields.append("ticket_type = %s")
-        params.append(ticket_type)
-    if master_name is not None:
-        fields.append("master_id = %s")
-        params.append(master_id)
-
-    if fields:
-        sql = f"UPDATE requests SET {', '.join(fields)} WHERE request_id = %s"
-        params.append(request_id)
-        cur.execute(sql, tuple(params))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+    with _conn_cursor() as (conn, cur):
+        status_id: Optional[int] = None
+        if status_name:
+            status_id = _get_status_id(status_name, cur)
+
+        master_id: Optional[int] = None
+        if master_name:
+            master_id = _get_user_id_by_master_name(master_name, cur)
+
+        # Обновляем только переданные поля; мастер сбрасывается в NULL, если имя передано,
+        # но не найдено. Порядок совпадает с _OPERATOR_UPDATE_FIELDS.
+        values = (operator_group, responsible_operator, observers_text, status_id, priority, ticket_type, master_id)
+        given = (
+            operator_group is not None,
+            responsible_operator is not None,
+            observers_text is not None,
+            status_id is not None,
+            priority is not None,
+            ticket_type is not None,
+            master_name is not None,
+        )
+        mask = 0
+        params: List[Any] = []
+        for bit, (value, is_given) in enumerate(zip(values, given)):
+            if is_given:
+                mask |= 1 << bit
+                params.append(value)
+
+        if mask:
+            params.append(request_id)
+            _exec_prepared(conn, _operator_update_sql(mask), tuple(params))
 
 
+def find_duplicate_requests() -> List[Dict[str, Any]]:
+    """
+    Найти дубликаты заявок: тот же клиент и то же описание проблемы
+    (без учёта регистра и пробелов по краям).
+    Возвращает словари {request_id, orig_id}, где orig_id — самая ранняя такая заявка.
+    """
+    with _connection() as conn:
+        query = """
+            SELECT r1.request_id, MIN(r2.request_id) AS orig_id
+            FROM requests r1
+            JOIN requests r2
+              ON r1.client_id = r2.client_id
+             AND r1.problem_key = r2.problem_key
+             AND r1.request_id > r2.request_id
+             -- problem_key хранит только начало текста, полное совпадение проверяем отдельно
+             AND LOWER(TRIM(r1.problem_description)) = LOWER(TRIM(r2.problem_description))
+            GROUP BY r1.request_id
+            ORDER BY r1.request_id
+        """
+        rows = _fetch_dicts(_exec_prepared(conn, query))
+    return rows
+
+
+@_invalidates_queries
 def delete_request(request_id: int) -> None:
     """Удалить заявку (каскадно удалятся комментарии, вложения и запчасти по внешним ключам)."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM requests WHERE request_id = %s", (request_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
+    with _conn_cursor() as (_, cur):
+        cur.execute("DELETE FROM requests WHERE request_id = %s", (request_id,))
+    _invalidate("comments", request_id)
+    _invalidate("attachments", request_id)
 
 
+@_cached_query
 def fetch_requests_for_master(master_id: int) -> List[Dict[str, Any]]:
     """
     Получить список заявок, назначенных конкретному мастеру.
     Используется во вкладке мастера, сортировка по приоритету.
     """
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    query = """
-        SELECT
-          r.request_id,
-          r.start_date,
-          r.problem_description,
-          rs.status_name      AS status,
-          r.priority,
-          r.ticket_type,
-          r.operator_group,
-          r.responsible_operator,
-          r.observers_text,
-          r.notify_client,
-          r.requires_parts,
-          r.report,
-          c.user_id           AS client_id,
-          c.lastname          AS client_lastname,
-          c.firstname         AS client_firstname,
-          c.surname           AS client_surname,
-          c.phone             AS client_phone,
-          e.equipment_id,
-          et.type_name        AS equipment_type,
-          e.model             AS equipment_model
-        FROM requests r
-        JOIN users c              ON r.client_id = c.user_id
-        JOIN equipment e          ON r.equipment_id = e.equipment_id
-        JOIN equipment_types et   ON e.type_id = et.type_id
-        JOIN request_statuses rs  ON r.status_id = rs.status_id
-        WHERE r.master_id = %s
-        ORDER BY
-          CASE r.priority
-            WHEN 'Высокий' THEN 1
-            WHEN 'Средний' THEN 2
-            WHEN 'Низкий'  THEN 3
-            ELSE 4
-          END,
-          r.start_date,
-          r.request_id
-    """
-    cur.execute(query, (master_id,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with _connection() as conn:
+        query = """
+            SELECT
+              r.request_id,
+              r.start_date,
+              r.problem_description,
+              rs.status_name      AS status,
+              r.priority,
+              r.ticket_type,
+              r.operator_group,
+              r.responsible_operator,
+              r.observers_text,
+              r.notify_client,
+              r.requires_parts,
+              r.report,
+              c.user_id           AS client_id,
+              c.lastname          AS client_lastname,
+              c.firstname         AS client_firstname,
+              c.surname           AS client_surname,
+              c.phone             AS client_phone,
+              e.equipment_id,
+              et.type_name        AS equipment_type,
+              e.model             AS equipment_model
+            FROM requests r
+            JOIN users c              ON r.client_id = c.user_id
+            JOIN equipment e          ON r.equipment_id = e.equipment_id
+            JOIN equipment_types et   ON e.type_id = et.type_id
+            JOIN request_statuses rs  ON r.status_id = rs.status_id
+            WHERE r.master_id = %s
+            ORDER BY r.priority_rank, r.start_date, r.request_id
+        """
+        rows = _fetch_dicts(_exec_prepared(conn, query, (master_id,)))
     return rows
 
 
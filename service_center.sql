@@ -23,6 +23,8 @@ CREATE TABLE IF NOT EXISTS users (
   login     VARCHAR(50)  NOT NULL UNIQUE,
   password  VARCHAR(255) NOT NULL,
   role_id   INT          NOT NULL,
+  UNIQUE KEY uq_users_phone_role (phone, role_id),
+  FULLTEXT KEY ft_users_name_phone (lastname, firstname, surname, phone),
   CONSTRAINT fk_users_role
     FOREIGN KEY (role_id) REFERENCES roles (role_id)
       ON UPDATE CASCADE ON DELETE RESTRICT
@@ -30,13 +32,16 @@ CREATE TABLE IF NOT EXISTS users (
 
 CREATE TABLE IF NOT EXISTS equipment_types (
   type_id   INT PRIMARY KEY AUTO_INCREMENT,
-  type_name VARCHAR(50) NOT NULL UNIQUE
+  type_name VARCHAR(50) NOT NULL UNIQUE,
+  FULLTEXT KEY ft_equipment_types_name (type_name)
 );
 
 CREATE TABLE IF NOT EXISTS equipment (
   equipment_id INT PRIMARY KEY AUTO_INCREMENT,
   type_id      INT          NOT NULL,
   model        VARCHAR(100) NOT NULL,
+  UNIQUE KEY uq_equipment_type_model (type_id, model),
+  FULLTEXT KEY ft_equipment_model (model),
   CONSTRAINT fk_equipment_type
     FOREIGN KEY (type_id) REFERENCES equipment_types (type_id)
       ON UPDATE CASCADE ON DELETE RESTRICT
@@ -44,7 +49,8 @@ CREATE TABLE IF NOT EXISTS equipment (
 
 CREATE TABLE IF NOT EXISTS request_statuses (
   status_id   INT PRIMARY KEY AUTO_INCREMENT,
-  status_name VARCHAR(50) NOT NULL UNIQUE
+  status_name VARCHAR(50) NOT NULL UNIQUE,
+  FULLTEXT KEY ft_request_statuses_name (status_name)
 );
 
 CREATE TABLE IF NOT EXISTS parts (
@@ -72,6 +78,24 @@ CREATE TABLE IF NOT EXISTS requests (
   operator_group      VARCHAR(100) NULL,
   responsible_operator VARCHAR(100) NULL,
   observers_text      TEXT         NULL,
+  -- числовой ранг приоритета для сортировки списка мастера без filesort
+  priority_rank       TINYINT AS (
+                        CASE priority
+                          WHEN 'Высокий' THEN 1
+                          WHEN 'Средний' THEN 2
+                          WHEN 'Низкий'  THEN 3
+                          ELSE 4
+                        END
+                      ) STORED,
+  -- нормализованное описание (начало) для поиска дубликатов по индексу
+  problem_key         VARCHAR(255) AS (LEFT(LOWER(TRIM(problem_description)), 255)) STORED,
+  -- полнотекстовый поиск по архиву (search_requests)
+  FULLTEXT KEY ft_requests_text (problem_description, priority, ticket_type),
+  KEY ix_master_pri (master_id, priority_rank, start_date, request_id),
+  KEY ix_req_client (client_id, start_date, request_id),
+  KEY ix_req_dup (client_id, problem_key),
+  -- в MySQL нет частичных индексов; ведущий notify_client отсекает всё, кроме ожидающих оповещения
+  KEY ix_notify (notify_client, client_id, request_id),
   CONSTRAINT fk_requests_equipment
     FOREIGN KEY (equipment_id) REFERENCES equipment (equipment_id)
       ON UPDATE CASCADE ON DELETE RESTRICT,
@@ -107,6 +131,7 @@ CREATE TABLE IF NOT EXISTS comments (
   user_id    INT         NOT NULL,
   request_id INT         NOT NULL,
   created_at TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  KEY ix_comments_req (request_id, created_at, comment_id),
   CONSTRAINT fk_comments_user
     FOREIGN KEY (user_id) REFERENCES users (user_id)
       ON UPDATE CASCADE ON DELETE RESTRICT,
@@ -123,6 +148,7 @@ CREATE TABLE IF NOT EXISTS attachments (
   file_path     VARCHAR(255) NOT NULL,
   description   VARCHAR(255) NULL,
   uploaded_at   TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  KEY ix_attach_req (request_id, uploaded_at, attachment_id),
   CONSTRAINT fk_attachments_request
     FOREIGN KEY (request_id) REFERENCES requests (request_id)
       ON UPDATE CASCADE ON DELETE CASCADE,
@@ -10,10 +10,20 @@
 """
 
 import sys
-from typing import Optional, List
-
-from PyQt5.QtCore import Qt
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+from PyQt5.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QRunnable,
+    Qt,
+    QThreadPool,
+    QTimer,
+    pyqtSignal,
+)
 from PyQt5.QtWidgets import (
+    QAbstractItemView,
     QApplication,
     QMainWindow,
     QWidget,
@@ -24,14 +34,15 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QTextEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QMessageBox,
     QFileDialog,
     QComboBox,
     QGroupBox,
+    QHeaderView,
     QFormLayout,
     QInputDialog,
+    QSpinBox,
 )
 
 from db_connection import (
@@ -41,20 +52,322 @@ from db_connection import (
     fetch_client_requests,
     fetch_request_comments,
     add_attachment as db_add_attachment,
-    add_comment,
     update_request_client_side,
     fetch_all_requests,
+    fetch_request,
     search_requests,
     update_request_operator_side,
     delete_request,
+    find_duplicate_requests,
     fetch_requests_for_master,
     set_request_requires_parts,
-    update_request_status_and_report,
+    save_status_with_comment,
     get_user_id_by_name_or_login,
     get_status_id,
+    ensure_indexes,
+    DB_POOL_SIZE,
 )
 
 
+# Сколько заявок оператор получает за один запрос по умолчанию.
+OPERATOR_PAGE_SIZE = 200
+# Пауза после последнего нажатия клавиши перед поиском по архиву, мс.
+ARCHIVE_SEARCH_DELAY_MS = 250
+# Сколько показывается уведомление в строке состояния, мс.
+TOAST_TIMEOUT_MS = 3000
+
+# Общий стиль приложения: строка собирается один раз при импорте модуля.
+_APP_QSS = """
+QMainWindow {
+    background-color: #f5f7fb;
+}
+QTabWidget::pane {
+    border-top: 2px solid #cccccc;
+    background: #ffffff;
+}
+QTabBar::tab {
+    background: #e0e4f5;
+    border: 1px solid #b8c0e0;
+    padding: 6px 14px;
+    margin-right: 2px;
+    border-bottom-color: #b8c0e0;
+}
+QTabBar::tab:selected {
+    background: #ffffff;
+    border-bottom-color: #ffffff;
+    font-weight: bold;
+}
+QGroupBox {
+    font-weight: bold;
+    border: 1px solid #c0c8e0;
+    border-radius: 6px;
+    margin-top: 10px;
+    background-color: #ffffff;
+}
+QGroupBox::title {
+    subcontrol-origin: margin;
+    subcontrol-position: top left;
+    padding: 0 6px;
+}
+QLabel {
+    font-size: 12px;
+}
+QLineEdit, QTextEdit, QComboBox {
+    background-color: #fbfcff;
+    border: 1px solid #c0c8e0;
+    border-radius: 4px;
+    padding: 3px;
+}
+QPushButton {
+    background-color: #4b6ef5;
+    color: white;
+    border-radius: 4px;
+    padding: 6px 14px;
+}
+QPushButton:hover {
+    background-color: #3d5ed8;
+}
+QPushButton:pressed {
+    background-color: #324fad;
+}
+QTableView {
+    background-color: #ffffff;
+    gridline-color: #d0d7e5;
+}
+QHeaderView::section {
+    background-color: #e5e9f5;
+    padding: 4px;
+    border: 1px solid #c0c8e0;
+}
+"""
+
+
+class RequestsModel(QAbstractTableModel):
+    """
+    Модель таблицы заявок поверх списка словарей из db_connection.
+    Текст ячейки вычисляется только для видимых строк и только для DisplayRole,
+    поэтому загрузка N заявок — это одна замена списка, а не N×столбцов виджетов.
+    """
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        columns: Sequence[Callable[[dict], str]],
+        parent: Optional[QWidget] = None,
+    ):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._columns = tuple(columns)
+        self._rows: List[dict] = []
+        # источник страниц для ленивой подгрузки: fetch_page(limit, offset)
+        self._fetch_page: Optional[Callable[[int, int], List[dict]]] = None
+        self._page_size = 0
+        self._has_more = False
+
+    @property
+    def rows(self) -> List[dict]:
+        """Загруженные строки; fetchMore дописывает в этот же список."""
+        return self._rows
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self._columns[index.column()](self._rows[index.row()])
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if role != Qt.DisplayRole or orientation != Qt.Horizontal:
+            return None
+        return self._headers[section]
+
+    def set_rows(self, rows: List[dict]) -> None:
+        """Заменить все строки модели одним сбросом."""
+        self.beginResetModel()
+        self._rows = rows
+        self._fetch_page = None
+        self._has_more = False
+        self.endResetModel()
+
+    def update_request(self, request: dict) -> None:
+        """Заменить строку с тем же request_id и перерисовать только её."""
+        for row, r in enumerate(self._rows):
+            if r["request_id"] == request["request_id"]:
+                self._rows[row] = request
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._columns) - 1), [Qt.DisplayRole])
+                return
+
+    def set_source(
+        self,
+        fetch_page: Callable[[int, int], List[dict]],
+        page_size: int,
+        first_page: Optional[List[dict]] = None,
+    ) -> None:
+        """
+        Показать первую страницу, остальные строки дочитываются через fetchMore,
+        когда представление докручено до конца. first_page — уже прочитанная первая страница.
+        """
+        if first_page is None:
+            first_page = fetch_page(page_size, 0)
+        self.beginResetModel()
+        self._rows = first_page
+        self._fetch_page = fetch_page
+        self._page_size = page_size
+        # неполная страница — значит, строк больше нет; COUNT(*) не нужен
+        self._has_more = len(first_page) >= page_size
+        self.endResetModel()
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or self._fetch_page is None:
+            return
+        page = self._fetch_page(self._page_size, len(self._rows))
+        self._has_more = len(page) >= self._page_size
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+
+def _comment_line(c: dict) -> str:
+    author = f"{c['lastname']} {c['firstname']}".strip()
+    return f"[{c['created_at']}] {c['role_name']} {author}: {c['message']}"
+
+
+def _format_history(comments: List[dict]) -> str:
+    """Текст истории комментариев заявки для QTextEdit."""
+    return "\n".join([_comment_line(c) for c in comments])
+
+
+class HistoryView(QTextEdit):
+    """
+    Поле истории заявки, которое загружает комментарии в фоне, не блокируя GUI.
+    Результат устаревшей загрузки (пользователь уже выбрал другую заявку) отбрасывается.
+    """
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self._token = 0
+
+    def load(self, request_id: int) -> None:
+        self._token += 1
+        token = self._token
+        self.setPlainText("Загрузка истории...")
+
+        def fetch() -> Optional[str]:
+            # пока задача ждала в очереди, могли выбрать другую заявку — тогда в БД не идём
+            if token != self._token:
+                return None
+            return _format_history(fetch_request_comments(request_id))
+
+        run_in_background(fetch, lambda text, error: self._on_loaded(token, text, error))
+
+    def reset(self) -> None:
+        """Очистить поле и отменить ожидание текущей загрузки."""
+        self._token += 1
+        self.clear()
+
+    def _on_loaded(self, token: int, text: Optional[str], error: str) -> None:
+        if token != self._token:
+            return
+        if error:
+            self.setPlainText(f"Не удалось загрузить историю: {error}")
+            return
+        self.setPlainText(text or "")
+
+
+class _TaskSignals(QObject):
+    # результат функции и текст ошибки; пустая строка — задача выполнена успешно
+    finished = pyqtSignal(object, str)
+
+
+class DbTask(QRunnable):
+    """Выполняет работу с БД в пуле потоков и передаёт результат сигналом в GUI-поток."""
+
+    def __init__(self, func: Callable[[], Any]):
+        super().__init__()
+        self.func = func
+        self.signals = _TaskSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.func()
+        except Exception as e:  # ошибку показываем в GUI-потоке
+            self.signals.finished.emit(None, str(e) or e.__class__.__name__)
+            return
+        self.signals.finished.emit(result, "")
+
+
+# Сигналы запущенных задач: держим ссылки, пока результат не доставлен в GUI-поток.
+_RUNNING_TASKS: Set[_TaskSignals] = set()
+# Пул потоков для задач БД: потоков меньше, чем соединений в пуле db_connection, на одно —
+# его занимают синхронные вызовы из GUI-потока. Иначе при DB_POOL_SIZE фоновых загрузках
+# GUI-поток (или лишняя задача) получил бы PoolError: пул mysql.connector не ждёт соединения.
+_DB_THREADS: Optional[QThreadPool] = None
+
+
+def _db_threads() -> QThreadPool:
+    global _DB_THREADS
+    if _DB_THREADS is None:
+        _DB_THREADS = QThreadPool()
+        _DB_THREADS.setMaxThreadCount(max(1, DB_POOL_SIZE - 1))
+    return _DB_THREADS
+
+
+def run_in_background(func: Callable[[], Any], on_done: Callable[[Any, str], None]) -> None:
+    """Запустить func в пуле потоков БД; on_done(результат, ошибка) вызывается в GUI-потоке."""
+    task = DbTask(func)
+    signals = task.signals
+    _RUNNING_TASKS.add(signals)
+    signals.finished.connect(on_done)
+    signals.finished.connect(lambda *_: _RUNNING_TASKS.discard(signals))
+    _db_threads().start(task)
+
+
+def _toast(widget: QWidget, message: str) -> None:
+    """
+    Короткое уведомление в строке состояния главного окна, без модального окна.
+    QMessageBox остаётся для ошибок и сообщений, которые нужно прочитать.
+    """
+    window = widget.window()
+    if isinstance(window, QMainWindow):
+        window.statusBar().showMessage(message, TOAST_TIMEOUT_MS)
+    else:
+        QMessageBox.information(widget, "Информация", message)
+
+
+def _make_requests_table(model: RequestsModel) -> QTableView:
+    """Таблица заявок с общими для всех вкладок настройками."""
+    table = QTableView()
+    table.setModel(model)
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    table.horizontalHeader().setStretchLastSection(True)
+    header = table.verticalHeader()
+    header.setVisible(False)
+    # одинаковая высота строк: Qt не измеряет текст каждой строки при сбросе модели
+    header.setSectionResizeMode(QHeaderView.Fixed)
+    header.setDefaultSectionSize(table.fontMetrics().height() + 10)
+    # на время сброса модели отключаем перерисовку, после — одна перерисовка
+    model.modelAboutToBeReset.connect(lambda: table.setUpdatesEnabled(False))
+    model.modelReset.connect(lambda: _resume_updates(table))
+    return table
+
+
+def _resume_updates(table: QTableView) -> None:
+    table.setUpdatesEnabled(True)
+    table.viewport().update()
+
+
 class ClientTab(QWidget):
     def __init__(self, system: Optional[object] = None, parent: Optional[QWidget] = None):
         super().__init__(parent)
@@ -63,6 +376,8 @@ class ClientTab(QWidget):
         self.system = system
         self.current_request: Optional[dict] = None
         self.requests: List[dict] = []
+        # телефон, по которому загружен self.requests
+        self.requests_phone = ""
 
         main_layout = QVBoxLayout()
         main_layout.setSpacing(15)
@@ -109,15 +424,19 @@ class ClientTab(QWidget):
         search_form.addWidget(self.search_phone_edit)
         search_form.addWidget(search_btn)
 
-        self.client_table = QTableWidget(0, 5)
-        self.client_table.setHorizontalHeaderLabels(
-            ["ID", "Устройство", "Модель", "Статус", "Приоритет"]
+        self.model = RequestsModel(
+            ["ID", "Устройство", "Модель", "Статус", "Приоритет"],
+            (
+                lambda t: str(t["request_id"]),
+                lambda t: t["equipment_type"],
+                lambda t: t["model"],
+                lambda t: t["status"],
+                lambda t: "-",
+            ),
+            self,
         )
-        self.client_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.client_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.client_table.horizontalHeader().setStretchLastSection(True)
-        self.client_table.verticalHeader().setVisible(False)
-        self.client_table.cellClicked.connect(self.on_ticket_selected)
+        self.client_table = _make_requests_table(self.model)
+        self.client_table.selectionModel().currentRowChanged.connect(self.on_ticket_selected)
 
         search_layout.addLayout(search_form)
         search_layout.addWidget(self.client_table)
@@ -130,8 +449,7 @@ class ClientTab(QWidget):
         detail_layout = QVBoxLayout()
 
         self.ticket_info_label = QLabel("Заявка не выбрана.")
-        self.history_view = QTextEdit()
-        self.history_view.setReadOnly(True)
+        self.history_view = HistoryView()
 
         edit_form = QFormLayout()
         edit_form.setLabelAlignment(Qt.AlignRight)
@@ -196,30 +514,23 @@ class ClientTab(QWidget):
         # загрузка заявок клиента из БД
         tickets = fetch_client_requests(phone)
         self.requests = tickets
-        self.client_table.setRowCount(0)
-        for t in tickets:
-            row = self.client_table.rowCount()
-            self.client_table.insertRow(row)
-            self.client_table.setItem(row, 0, QTableWidgetItem(str(t["request_id"])))
-            self.client_table.setItem(row, 1, QTableWidgetItem(t["equipment_type"]))
-            self.client_table.setItem(row, 2, QTableWidgetItem(t["model"]))
-            self.client_table.setItem(row, 3, QTableWidgetItem(t["status"]))
-            self.client_table.setItem(row, 4, QTableWidgetItem("-"))
+        self.requests_phone = phone
+        self.model.set_rows(tickets)
         if not tickets:
-            QMessageBox.information(self, "Результат", "Заявки не найдены.")
+            _toast(self, "Заявки не найдены.")
         self.current_request = None
         self.update_details()
 
     def _get_selected_request(self) -> Optional[dict]:
-        row = self.client_table.currentRow()
+        row = self.client_table.currentIndex().row()
         if row < 0:
             return None
         if row >= len(self.requests):
             return None
         return self.requests[row]
 
-    def on_ticket_selected(self, row: int, column: int) -> None:
-        _ = column  # unused
+    def on_ticket_selected(self, current: QModelIndex, previous: QModelIndex) -> None:
+        _ = current, previous  # unused
         self.current_request = self._get_selected_request()
         self.update_details()
 
@@ -229,7 +540,7 @@ class ClientTab(QWidget):
             self.ticket_info_label.setText("Заявка не выбрана.")
             self.edit_model.clear()
             self.edit_problem.clear()
-            self.history_view.clear()
+            self.history_view.reset()
             return
         self.ticket_info_label.setText(
             f"Заявка ID {r['request_id']}: {r['equipment_type']} {r['model']}, статус {r['status']}"
@@ -237,13 +548,8 @@ class ClientTab(QWidget):
         self.edit_model.setText(r["model"])
         self.edit_problem.setPlainText(r["problem_description"])
 
-        # история комментариев из БД
-        comments = fetch_request_comments(r["request_id"])
-        history_lines: List[str] = []
-        for c in comments:
-            author = f"{c['lastname']} {c['firstname']}".strip()
-            history_lines.append(f"[{c['created_at']}] {c['role_name']} {author}: {c['message']}")
-        self.history_view.setPlainText("\n".join(history_lines))
+        # история комментариев из БД (в фоне)
+        self.history_view.load(r["request_id"])
 
     def save_client_changes(self) -> None:
         r = self.current_request
@@ -260,7 +566,7 @@ class ClientTab(QWidget):
             new_problem_description=new_problem or None,
             new_model=new_model or None,
         )
-        QMessageBox.information(self, "Успех", "Изменения сохранены.")
+        _toast(self, "Изменения сохранены.")
         # перечитать заявки клиента
         self.search_tickets()
 
@@ -277,9 +583,19 @@ class ClientTab(QWidget):
             desc = "Файл клиента"
         # user_id клиента есть в текущей записи (client_id)
         client_id = r["client_id"]
-        db_add_attachment(r["request_id"], client_id, path, desc)
-        add_comment(r["request_id"], client_id, f"К заявке прикреплён файл: {path}")
-        QMessageBox.information(self, "Успех", "Файл прикреплён.")
+        request_id = r["request_id"]
+        # запись вложения и комментария — одна транзакция вне GUI-потока
+        run_in_background(
+            lambda: db_add_attachment(request_id, client_id, path, desc, f"К заявке прикреплён файл: {path}"),
+            self._on_file_attached,
+        )
+
+    def _on_file_attached(self, result: Any, error: str) -> None:
+        _ = result
+        if error:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прикрепить файл: {error}")
+            return
+        _toast(self, "Файл прикреплён.")
         self.update_details()
 
     def check_notifications(self) -> None:
@@ -287,11 +603,12 @@ class ClientTab(QWidget):
         if not phone:
             QMessageBox.warning(self, "Ошибка", "Сначала укажите телефон и выполните поиск.")
             return
-        # показываем завершённые заявки текущего клиента по данным из БД
-        requests = fetch_client_requests(phone)
+        # показываем завершённые заявки текущего клиента; если поиск по этому телефону
+        # уже выполнен, повторно в БД не ходим
+        requests = self.requests if phone == self.requests_phone else fetch_client_requests(phone)
         completed = [r for r in requests if r["notify_client"]]
         if not completed:
-            QMessageBox.information(self, "Оповещения", "Нет завершённых заявок, требующих оповещения.")
+            _toast(self, "Нет завершённых заявок, требующих оповещения.")
             return
         msg_lines = []
         for r in completed:
@@ -316,8 +633,7 @@ class OperatorTab(QWidget):
         main_layout.setContentsMargins(15, 15, 15, 15)
 
         # --- Список заявок ---
-        self.table = QTableWidget(0, 7)
-        self.table.setHorizontalHeaderLabels(
+        self.model = RequestsModel(
             [
                 "ID",
                 "Клиент",
@@ -326,13 +642,20 @@ class OperatorTab(QWidget):
                 "Статус",
                 "Приоритет",
                 "Мастер",
-            ]
+            ],
+            (
+                lambda r: str(r["request_id"]),
+                lambda r: r["client_fio"],
+                lambda r: r["client_phone"],
+                lambda r: r["equipment_str"],
+                lambda r: r["status"],
+                lambda r: r["priority"],
+                lambda r: r["master_fio"] or "-",
+            ),
+            self,
         )
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.verticalHeader().setVisible(False)
-        self.table.cellClicked.connect(self.on_ticket_selected)
+        self.table = _make_requests_table(self.model)
+        self.table.selectionModel().currentRowChanged.connect(self.on_ticket_selected)
 
         main_layout.addWidget(QLabel("Список заявок:"))
         main_layout.addWidget(self.table)
@@ -382,9 +705,22 @@ class OperatorTab(QWidget):
         self.archive_search_edit = QLineEdit()
         archive_btn = QPushButton("Поиск в архиве")
         archive_btn.clicked.connect(self.search_archive)
+        # поиск по мере ввода: запрос уходит, когда ввод затих на ARCHIVE_SEARCH_DELAY_MS
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(ARCHIVE_SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._do_search_archive)
+        self.archive_search_edit.textChanged.connect(self._search_timer.start)
         search_layout.addWidget(QLabel("Поиск в архиве:"))
         search_layout.addWidget(self.archive_search_edit)
         search_layout.addWidget(archive_btn)
+        # сколько заявок читать из БД за один запрос
+        self.page_size_spin = QSpinBox()
+        self.page_size_spin.setRange(50, 10000)
+        self.page_size_spin.setSingleStep(50)
+        self.page_size_spin.setValue(OPERATOR_PAGE_SIZE)
+        search_layout.addWidget(QLabel("Заявок на странице:"))
+        search_layout.addWidget(self.page_size_spin)
         detail_layout.addRow(search_layout)
 
         detail_group.setLayout(detail_layout)
@@ -396,36 +732,21 @@ class OperatorTab(QWidget):
     def reload_table(self, requests: Optional[List[dict]] = None) -> None:
         """Перечитать и отобразить список заявок из БД."""
         if requests is None:
-            requests = fetch_all_requests()
-        self.requests = requests
-        self.table.setRowCount(0)
-        for r in requests:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            client_fio = f"{r['client_lastname']} {r['client_firstname']} {r['client_surname']}".strip()
-            equipment = f"{r['equipment_type']} {r['equipment_model']}"
-            master_name = "-"
-            if r.get("master_lastname"):
-                master_name = f"{r['master_lastname']} {r.get('master_firstname', '')}".strip()
-
-            self.table.setItem(row, 0, QTableWidgetItem(str(r["request_id"])))
-            self.table.setItem(row, 1, QTableWidgetItem(client_fio))
-            self.table.setItem(row, 2, QTableWidgetItem(r["client_phone"]))
-            self.table.setItem(row, 3, QTableWidgetItem(equipment))
-            self.table.setItem(row, 4, QTableWidgetItem(r["status"]))
-            self.table.setItem(row, 5, QTableWidgetItem(r["priority"]))
-            self.table.setItem(row, 6, QTableWidgetItem(master_name))
+            self.model.set_source(fetch_all_requests, self.page_size_spin.value())
+        else:
+            self.model.set_rows(requests)
+        self.requests = self.model.rows
 
     def _get_selected_request(self) -> Optional[dict]:
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             return None
         if row >= len(self.requests):
             return None
         return self.requests[row]
 
-    def on_ticket_selected(self, row: int, column: int) -> None:
-        _ = row, column
+    def on_ticket_selected(self, current: QModelIndex, previous: QModelIndex) -> None:
+        _ = current, previous
         self.current_request = self._get_selected_request()
         self.update_details()
 
@@ -483,44 +804,65 @@ class OperatorTab(QWidget):
             ticket_type=ticket_type,
             master_name=master_name,
         )
-        self.reload_table()
-        QMessageBox.information(self, "Успех", "Изменения по заявке сохранены.")
+        # перечитываем только изменённую заявку (по первичному ключу), а не весь список
+        fresh = fetch_request(r["request_id"])
+        if fresh is not None:
+            self.model.update_request(fresh)
+            self.current_request = fresh
+        _toast(self, "Изменения по заявке сохранены.")
 
     def delete_duplicates(self) -> None:
-        # Поиск и удаление дубликатов по клиенту (телефон) и описанию проблемы
-        requests = fetch_all_requests()
-        seen = {}
-        for r in requests:
-            key = (
-                r["client_phone"],
-                (r["problem_description"] or "").strip().lower(),
+        # Дубликаты (тот же клиент и описание проблемы) ищет сама БД,
+        # сюда приходят только пары id
+        deleted = False
+        for d in find_duplicate_requests():
+            reply = QMessageBox.question(
+                self,
+                "Дубликат заявки",
+                f"Найден дубликат заявки ID {d['request_id']} (оригинал ID {d['orig_id']}). Удалить?",
+                QMessageBox.Yes | QMessageBox.No,
             )
-            if key in seen:
-                orig_id = seen[key]
-                reply = QMessageBox.question(
-                    self,
-                    "Дубликат заявки",
-                    f"Найден дубликат заявки ID {r['request_id']} (оригинал ID {orig_id}). Удалить?",
-                    QMessageBox.Yes | QMessageBox.No,
-                )
-                if reply == QMessageBox.Yes:
-                    delete_request(r["request_id"])
-            else:
-                seen[key] = r["request_id"]
+            if reply == QMessageBox.Yes:
+                delete_request(d["request_id"])
+                deleted = True
 
-        self.reload_table()
-        QMessageBox.information(self, "Результат", "Поиск дубликатов завершён.")
+        if deleted:
+            self.reload_table()
+        _toast(self, "Поиск дубликатов завершён.")
 
     def search_archive(self) -> None:
+        """Поиск по кнопке: сразу, не дожидаясь таймера, и с сообщениями."""
+        self._search_timer.stop()
+        self._do_search_archive(notify=True)
+
+    def _do_search_archive(self, notify: bool = False) -> None:
         text = self.archive_search_edit.text().strip().lower()
         if not text:
-            QMessageBox.warning(self, "Ошибка", "Введите текст для поиска.")
+            if notify:
+                QMessageBox.warning(self, "Ошибка", "Введите текст для поиска.")
+            else:
+                # поле очищено — возвращаем полный список
+                self.reload_table()
             return
-        found = search_requests(text)
+        page_size = self.page_size_spin.value()
+        found = search_requests(text, page_size)
         if not found:
-            QMessageBox.information(self, "Поиск", "Ничего не найдено.")
+            if notify:
+                _toast(self, "Ничего не найдено.")
+            else:
+                self.model.set_rows([])
+                self.requests = self.model.rows
             return
-        self.reload_table(found)
+        self.model.set_source(lambda limit, offset: search_requests(text, limit, offset), page_size, found)
+        self.requests = self.model.rows
+
+
+def _load_master_requests(name: str) -> Tuple[Optional[int], List[dict]]:
+    """Найти мастера по фамилии/логину и прочитать его заявки (для фонового потока)."""
+    master_id = get_user_id_by_name_or_login(name)
+    if master_id is None:
+        return None, []
+    return master_id, fetch_requests_for_master(master_id)
 
 
 class MasterTab(QWidget):
@@ -542,23 +884,27 @@ class MasterTab(QWidget):
         master_layout = QHBoxLayout()
         master_layout.setSpacing(10)
         self.master_edit = QLineEdit()
-        set_master_btn = QPushButton("Установить имя мастера")
-        set_master_btn.clicked.connect(self.set_master)
+        self.set_master_btn = QPushButton("Установить имя мастера")
+        self.set_master_btn.clicked.connect(self.set_master)
         master_layout.addWidget(QLabel("Имя мастера:"))
         master_layout.addWidget(self.master_edit)
-        master_layout.addWidget(set_master_btn)
+        master_layout.addWidget(self.set_master_btn)
         main_layout.addLayout(master_layout)
 
         # --- Список назначенных заявок ---
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Устройство", "Модель", "Статус", "Приоритет"]
+        self.model = RequestsModel(
+            ["ID", "Устройство", "Модель", "Статус", "Приоритет"],
+            (
+                lambda t: str(t["request_id"]),
+                lambda t: t["equipment_type"],
+                lambda t: t["equipment_model"],
+                lambda t: t["status"],
+                lambda t: t["priority"],
+            ),
+            self,
         )
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.verticalHeader().setVisible(False)
-        self.table.cellClicked.connect(self.on_ticket_selected)
+        self.table = _make_requests_table(self.model)
+        self.table.selectionModel().currentRowChanged.connect(self.on_ticket_selected)
 
         main_layout.addWidget(QLabel("Назначенные заявки:"))
         main_layout.addWidget(self.table)
@@ -576,8 +922,7 @@ class MasterTab(QWidget):
         self.status_combo = QComboBox()
         self.status_combo.addItems(["Новая", "В работе", "Ожидает запчастей", "Завершена"])
         self.report_edit = QTextEdit()
-        self.history_view = QTextEdit()
-        self.history_view.setReadOnly(True)
+        self.history_view = HistoryView()
 
         detail_layout.addRow("Статус:", self.status_combo)
         detail_layout.addRow("Отчёт о выполненной работе:", self.report_edit)
@@ -610,40 +955,39 @@ class MasterTab(QWidget):
         if not self.master_name:
             QMessageBox.warning(self, "Ошибка", "Введите имя мастера.")
             return
-        self.master_id = get_user_id_by_name_or_login(self.master_name)
-        if self.master_id is None:
+        # поиск мастера и загрузка его заявок — в фоне; кнопка недоступна до ответа
+        name = self.master_name
+        self.set_master_btn.setEnabled(False)
+        run_in_background(lambda: _load_master_requests(name), self._on_master_loaded)
+
+    def _on_master_loaded(self, result: Any, error: str) -> None:
+        self.set_master_btn.setEnabled(True)
+        if error:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить заявки мастера: {error}")
+            return
+        master_id, tickets = result
+        if master_id is None:
             QMessageBox.warning(self, "Ошибка", "Мастер с таким именем/логином не найден в БД.")
             return
-        self.reload_table()
+        self.master_id = master_id
+        self._show_requests(tickets)
 
-    def reload_table(self) -> None:
-        if not self.master_id:
-            self.table.setRowCount(0)
-            return
-        tickets = fetch_requests_for_master(self.master_id)
+    def _show_requests(self, tickets: List[dict]) -> None:
         self.requests = tickets
-        self.table.setRowCount(0)
-        for t in tickets:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(t["request_id"])))
-            self.table.setItem(row, 1, QTableWidgetItem(t["equipment_type"]))
-            self.table.setItem(row, 2, QTableWidgetItem(t["equipment_model"]))
-            self.table.setItem(row, 3, QTableWidgetItem(t["status"]))
-            self.table.setItem(row, 4, QTableWidgetItem(t["priority"]))
+        self.model.set_rows(tickets)
         self.current_request = None
         self.update_details()
 
     def _get_selected_request(self) -> Optional[dict]:
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             return None
         if row >= len(self.requests):
             return None
         return self.requests[row]
 
-    def on_ticket_selected(self, row: int, column: int) -> None:
-        _ = row, column
+    def on_ticket_selected(self, current: QModelIndex, previous: QModelIndex) -> None:
+        _ = current, previous
         self.current_request = self._get_selected_request()
         self.update_details()
 
@@ -652,7 +996,7 @@ class MasterTab(QWidget):
         if not t:
             self.master_info_label.setText("Заявка не выбрана.")
             self.report_edit.clear()
-            self.history_view.clear()
+            self.history_view.reset()
             return
         self.master_info_label.setText(
             f"Заявка ID {t['request_id']}: {t['equipment_type']} {t['equipment_model']}, "
@@ -663,30 +1007,21 @@ class MasterTab(QWidget):
             self.status_combo.setCurrentIndex(idx)
         self.report_edit.setPlainText(t.get("report") or "")
 
-        comments = fetch_request_comments(t["request_id"])
-        history_lines: List[str] = []
-        for c in comments:
-            author = f"{c['lastname']} {c['firstname']}".strip()
-            history_lines.append(f"[{c['created_at']}] {c['role_name']} {author}: {c['message']}")
-        self.history_view.setPlainText("\n".join(history_lines))
+        self.history_view.load(t["request_id"])
 
     def send_for_parts(self) -> None:
         t = self.current_request
         if not t:
             QMessageBox.warning(self, "Ошибка", "Выберите заявку.")
             return
-        set_request_requires_parts(t["request_id"], True)
-        if self.master_id:
-            add_comment(
-                t["request_id"],
-                self.master_id,
-                "Отправлена заявка на заказ недостающих запчастей.",
-            )
-        QMessageBox.information(
-            self,
-            "Информация",
-            "Информация о необходимости заказа запчастей сохранена.",
+        # флаг и комментарий мастера — одной транзакцией
+        set_request_requires_parts(
+            t["request_id"],
+            True,
+            user_id=self.master_id,
+            message="Отправлена заявка на заказ недостающих запчастей.",
         )
+        _toast(self, "Информация о необходимости заказа запчастей сохранена.")
         self.update_details()
 
     def save_status(self) -> None:
@@ -697,20 +1032,20 @@ class MasterTab(QWidget):
         new_status = self.status_combo.currentText()
         status_id = get_status_id(new_status)
         notify = new_status.lower() in ("завершена", "выполнена", "готова к выдаче")
-        update_request_status_and_report(
+        save_status_with_comment(
             request_id=t["request_id"],
             status_id=status_id,
             report=None,
             notify_client=notify,
+            user_id=self.master_id,
+            message=f"Статус изменён на '{new_status}'.",
         )
-        if self.master_id:
-            add_comment(
-                t["request_id"],
-                self.master_id,
-                f"Статус изменён на '{new_status}'.",
-            )
-        QMessageBox.information(self, "Успех", "Статус заявки обновлён.")
-        self.reload_table()
+        # порядок строк от статуса не зависит — обновляем строку на месте
+        t["status"] = new_status
+        t["notify_client"] = int(notify)
+        self.model.update_request(t)
+        _toast(self, "Статус заявки обновлён.")
+        self.update_details()
 
     def save_report(self) -> None:
         t = self.current_request
@@ -723,19 +1058,17 @@ class MasterTab(QWidget):
             return
         # сохраняем отчёт и отмечаем, что клиента нужно оповестить
         status_id = get_status_id(t["status"])
-        update_request_status_and_report(
+        save_status_with_comment(
             request_id=t["request_id"],
             status_id=status_id,
             report=report,
             notify_client=True,
+            user_id=self.master_id,
+            message=f"Добавлен отчёт о выполненной работе: {report}",
         )
-        if self.master_id:
-            add_comment(
-                t["request_id"],
-                self.master_id,
-                f"Добавлен отчёт о выполненной работе: {report}",
-            )
-        QMessageBox.information(self, "Успех", "Отчёт сохранён.")
+        t["report"] = report
+        t["notify_client"] = 1
+        _toast(self, "Отчёт сохранён.")
         self.update_details()
 
     def attach_file(self) -> None:
@@ -747,14 +1080,22 @@ class MasterTab(QWidget):
         if not path:
             return
         desc = "Фото с места ремонта"
-        if self.master_id:
-            db_add_attachment(t["request_id"], self.master_id, path, desc)
-            add_comment(
-                t["request_id"],
-                self.master_id,
-                f"К заявке прикреплено фото: {path}",
-            )
-        QMessageBox.information(self, "Успех", "Файл прикреплён.")
+        if not self.master_id:
+            self._on_file_attached(None, "")
+            return
+        master_id = self.master_id
+        request_id = t["request_id"]
+        run_in_background(
+            lambda: db_add_attachment(request_id, master_id, path, desc, f"К заявке прикреплено фото: {path}"),
+            self._on_file_attached,
+        )
+
+    def _on_file_attached(self, result: Any, error: str) -> None:
+        _ = result
+        if error:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прикрепить файл: {error}")
+            return
+        _toast(self, "Файл прикреплён.")
         self.update_details()
 
 
@@ -772,80 +1113,27 @@ class MainWindow(QMainWindow):
         tabs.addTab(MasterTab(), "Мастер")
 
         self.setCentralWidget(tabs)
+        # строка состояния для уведомлений вкладок (_toast)
+        self.statusBar()
 
         # Общий стиль приложения
-        self.setStyleSheet(
-            """
-            QMainWindow {
-                background-color: #f5f7fb;
-            }
-            QTabWidget::pane {
-                border-top: 2px solid #cccccc;
-                background: #ffffff;
-            }
-            QTabBar::tab {
-                background: #e0e4f5;
-                border: 1px solid #b8c0e0;
-                padding: 6px 14px;
-                margin-right: 2px;
-                border-bottom-color: #b8c0e0;
-            }
-            QTabBar::tab:selected {
-                background: #ffffff;
-                border-bottom-color: #ffffff;
-                font-weight: bold;
-            }
-            QGroupBox {
-                font-weight: bold;
-                border: 1px solid #c0c8e0;
-                border-radius: 6px;
-                margin-top: 10px;
-                background-color: #ffffff;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                subcontrol-position: top left;
-                padding: 0 6px;
-            }
-            QLabel {
-                font-size: 12px;
-            }
-            QLineEdit, QTextEdit, QComboBox {
-                background-color: #fbfcff;
-                border: 1px solid #c0c8e0;
-                border-radius: 4px;
-                padding: 3px;
-            }
-            QPushButton {
-                background-color: #4b6ef5;
-                color: white;
-                border-radius: 4px;
-                padding: 6px 14px;
-            }
-            QPushButton:hover {
-                background-color: #3d5ed8;
-            }
-            QPushButton:pressed {
-                background-color: #324fad;
-            }
-            QTableWidget {
-                background-color: #ffffff;
-                gridline-color: #d0d7e5;
-            }
-            QHeaderView::section {
-                background-color: #e5e9f5;
-                padding: 4px;
-                border: 1px solid #c0c8e0;
-            }
-            """
-        )
+        self.setStyleSheet(_APP_QSS)
 
 
 def main():
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    skipped = ensure_indexes()
     window = MainWindow()
     window.show()
+    if skipped:
+        QMessageBox.warning(
+            window,
+            "Обновление БД",
+            "Уникальные ключи не добавлены из-за повторяющихся строк: "
+            + ", ".join(skipped)
+            + ".\nУдалите дубликаты, ключи будут добавлены при следующем запуске.",
+        )
     sys.exit(app.exec_())
 
 
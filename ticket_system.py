@@ -4,37 +4,200 @@
 Используется как внутренний модуль логики (в том числе в ticket_gui.py).
 Консольное меню и запуск из командной строки удалены: проект ориентирован на GUI и/или БД.
 
-Хранение: JSON-файл tickets_data.json.
+Хранение: JSON-файл tickets_data.json
+(или tickets_data.cbor при TICKETS_FORMAT=cbor и установленном cbor2;
+при TICKETS_COMPRESS=zstd и установленном zstandard файл сжимается и получает суффикс .zst).
 Для реляционной БД см. файлы service_center.sql и db_connection.py.
 """
 
+import hashlib
 import json
+import mmap
 import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from operator import attrgetter
 from typing import List, Optional, Dict, Any
 
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него работает стандартный json
+    orjson = None
+
+try:
+    import cbor2
+except ImportError:  # cbor2 нужен только для TICKETS_FORMAT=cbor
+    cbor2 = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard нужен только для TICKETS_COMPRESS=zstd
+    zstandard = None
+
+try:
+    from PyQt5.QtCore import QCoreApplication, QTimer
+except ImportError:  # без Qt сохранение выполняется сразу, без отложенной записи
+    QCoreApplication = None
+    QTimer = None
+
 
 DATA_FILE = "tickets_data.json"
+DATA_FILE_CBOR = "tickets_data.cbor"
+
+# Формат хранилища: "json" (по умолчанию) или "cbor" — компактнее и быстрее разбирается.
+# Без модуля cbor2 используется JSON.
+_BACKEND = os.environ.get("TICKETS_FORMAT", "json").strip().lower()
+# JSON пишется компактно; TICKETS_PRETTY=1 включает отступы для чтения файла человеком.
+_PRETTY = bool(os.environ.get("TICKETS_PRETTY"))
+# Сжатие файла данных: "zstd" — в разы меньше на диске для большой истории заявок.
+_COMPRESS = os.environ.get("TICKETS_COMPRESS", "").strip().lower()
+ZSTD_LEVEL = 3
+
+# Задержка записи файла после последнего изменения в GUI, мс: серия правок сохраняется один раз.
+SAVE_DELAY_MS = 500
+# JSON-файл от этого размера orjson разбирает прямо из отображения в память (mmap),
+# без копирования содержимого в объект bytes.
+MMAP_MIN_SIZE = 64 * 1024
+
+# Запись файла в фоне (для GUI): один поток сохраняет порядок записей,
+# замок не даёт двум записям одновременно работать с одним временным файлом.
+_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tickets-save")
+_WRITE_LOCK = threading.Lock()
+
+
+# Начало текущей минуты (time.time()) и её строковое представление для _now_minute.
+_TS_CACHE: List[Any] = [0.0, ""]
+
+
+def _now_minute() -> str:
+    """Текущее время в формате "%Y-%m-%d %H:%M"; strftime вызывается раз в минуту."""
+    now = time.time()
+    minute = now - now % 60
+    if minute != _TS_CACHE[0]:
+        _TS_CACHE[1] = datetime.fromtimestamp(minute).strftime("%Y-%m-%d %H:%M")
+        _TS_CACHE[0] = minute
+    return _TS_CACHE[1]
+
+
+def _use_cbor() -> bool:
+    return _BACKEND == "cbor" and cbor2 is not None
+
+
+def _use_zstd() -> bool:
+    return _COMPRESS == "zstd" and zstandard is not None
+
+
+def _data_path() -> str:
+    path = DATA_FILE_CBOR if _use_cbor() else DATA_FILE
+    return path + ".zst" if _use_zstd() else path
+
+
+def _legacy_paths() -> List[str]:
+    """Файлы данных прежних форматов, из которых можно перенести данные в _data_path()."""
+    current = _data_path()
+    paths = [DATA_FILE_CBOR, DATA_FILE] if _use_cbor() else [DATA_FILE]
+    return [path for path in paths if path != current]
 
 
 def load_data() -> Dict[str, Any]:
-    if not os.path.exists(DATA_FILE):
-        return {"tickets": [], "next_id": 1}
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    path = _data_path()
+    if not os.path.exists(path):
+        # файла в текущем формате ещё нет: читаем прежний, TicketSystem перепишет его
+        path = next((p for p in _legacy_paths() if os.path.exists(p)), "")
+        if not path:
+            return {"tickets": [], "next_id": 1}
+    if path == DATA_FILE and orjson is not None and os.path.getsize(path) >= MMAP_MIN_SIZE:
+        return _load_json_mmap(path)
+    # файл читается целиком одним вызовом и разбирается из bytes, без декодирования в str
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".zst"):
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+        path = path[:-len(".zst")]
+    if path == DATA_FILE_CBOR:
+        return cbor2.loads(raw)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _load_json_mmap(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        # orjson не принимает mmap напрямую, но читает из memoryview поверх него
+        with memoryview(mm) as view:
+            return orjson.loads(view)
+    finally:
+        mm.close()
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    if _use_cbor():
+        return cbor2.dumps(data)
+    if orjson is not None:
+        # orjson сразу отдаёт UTF-8 без экранирования кириллицы
+        option = orjson.OPT_NON_STR_KEYS
+        if _PRETTY:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if _PRETTY:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_atomic(payload: bytes) -> None:
+    """
+    Записать файл данных целиком: сначала во временный файл, затем os.replace.
+    При сбое во время записи на диске остаётся прежняя полная версия.
+    """
+    path = _data_path()
+    tmp_path = path + ".tmp"
+    if path.endswith(".zst"):
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    with _WRITE_LOCK:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            # данные должны оказаться на диске раньше переименования, иначе после сбоя питания
+            # может сохраниться новое имя с пустым или обрезанным содержимым
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if os.name == "posix":
+            # само переименование тоже записывается на диск вместе с каталогом
+            dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
 
 
 def save_data(data: Dict[str, Any]) -> None:
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    _write_atomic(_dumps(data))
 
 
+# dataclass без сгенерированного __init__: __slots__ несовместимы со значениями по умолчанию
+# в теле класса, а dataclass(slots=True) есть только с Python 3.10.
+# orjson сериализует такие объекты сам, без промежуточного to_dict(); сравнение, хэш и repr
+# остаются прежними (по идентичности), поэтому eq и repr отключены.
+@dataclass(init=False, repr=False, eq=False)
 class Message:
+    __slots__ = ("author_role", "author_name", "text", "created_at")
+    author_role: str
+    author_name: str
+    text: str
+    created_at: str
+
     def __init__(self, author_role: str, author_name: str, text: str, created_at: Optional[str] = None):
         self.author_role = author_role
         self.author_name = author_name
         self.text = text
-        self.created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.created_at = created_at or _now_minute()
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -47,14 +210,19 @@ class Message:
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "Message":
         return Message(
-            author_role=data["author_role"],
+            author_role=sys.intern(data["author_role"]),
             author_name=data["author_name"],
             text=data["text"],
             created_at=data["created_at"],
         )
 
 
+@dataclass(init=False, repr=False, eq=False)
 class Attachment:
+    __slots__ = ("filename", "description")
+    filename: str
+    description: str
+
     def __init__(self, filename: str, description: str = ""):
         self.filename = filename
         self.description = description
@@ -73,7 +241,58 @@ class Attachment:
         )
 
 
+def _objects_record(items: List[Any]) -> List[Any]:
+    """Список Message/Attachment для записи: orjson сериализует dataclass-объекты сам."""
+    if orjson is not None and not _use_cbor():
+        return items
+    return [item.to_dict() for item in items]
+
+
+# Поля Ticket, которые при загрузке остаются словарями до первого обращения.
+_LAZY_FIELDS = ("history", "attachments")
+# Поля Ticket с небольшим набором повторяющихся значений: при загрузке строки интернируются,
+# и одинаковые значения во всех заявках — один объект str.
+_INTERNED_FIELDS = ("status", "priority", "ticket_type", "operator_group", "responsible_operator", "assigned_master")
+
+
 class Ticket:
+    # Обязательные поля записи и необязательные со значениями по умолчанию;
+    # порядок _FIELDS совпадает с порядком ключей в JSON. Для списков по умолчанию — None:
+    # общий для всех заявок список из словаря нельзя отдавать экземплярам.
+    _REQUIRED = (
+        "ticket_id",
+        "device_type",
+        "device_model",
+        "problem_description",
+        "client_name",
+        "client_phone",
+    )
+    _DEFAULTS: Dict[str, Any] = {
+        "status": "Новая",
+        "priority": "Средний",
+        "ticket_type": "Стандартная",
+        "operator_group": "",
+        "responsible_operator": "",
+        "observers": None,
+        "assigned_master": "",
+        "history": None,
+        "attachments": None,
+        "requires_parts": False,
+        "created_at": None,
+        "updated_at": None,
+        "report": "",
+        "notify_client": False,
+    }
+    _FIELDS = _REQUIRED + tuple(_DEFAULTS)
+    # history и attachments разбираются из JSON лениво (см. свойства ниже) и хранятся в слотах
+    # _history/_attachments; исходные словари до первого обращения — в _raw_*.
+    _SLOTS = tuple("_" + name if name in _LAZY_FIELDS else name for name in _FIELDS)
+    # все поля одним вызовом attrgetter вместо отдельного чтения каждого атрибута;
+    # ленивые поля читаются из слотов, не вызывая разбор
+    _GETTER = attrgetter(*_SLOTS)
+
+    __slots__ = _SLOTS + ("_raw_history", "_raw_attachments", "_cached_dict", "_cached_values", "_dirty")
+
     def __init__(
         self,
         ticket_id: int,
@@ -97,6 +316,11 @@ class Ticket:
         report: str = "",
         notify_client: bool = False,
     ):
+        # словарь для сохранения, значения полей, из которых он собран,
+        # и признак того, что его нужно пересобрать (см. serialized)
+        self._cached_dict: Optional[Dict[str, Any]] = None
+        self._cached_values: Optional[tuple] = None
+        self._dirty = True
         self.ticket_id = ticket_id
         self.device_type = device_type
         self.device_model = device_model
@@ -113,67 +337,109 @@ class Ticket:
         self.history = history or []
         self.attachments = attachments or []
         self.requires_parts = requires_parts
-        self.created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.created_at = created_at or _now_minute()
         self.updated_at = updated_at or self.created_at
         self.report = report
         self.notify_client = notify_client
 
+    def mark_dirty(self) -> None:
+        """Вызывать после изменения списка observers на месте (history и attachments отслеживаются сами)."""
+        self._dirty = True
+
+    def serialized(self) -> Dict[str, Any]:
+        """Запись заявки для save_data, пересобираемая только после изменений заявки."""
+        # присваивание любого поля видно по снимку значений (сравнение кортежей идёт на C
+        # и для неизменённых полей сводится к проверке идентичности); перехват __setattr__
+        # замедлял бы каждое присваивание, в том числе при загрузке
+        values = Ticket._GETTER(self)
+        if self._dirty or values != self._cached_values:
+            data = dict(zip(Ticket._FIELDS, values))
+            data["history"] = self._raw_history
+            data["attachments"] = self._raw_attachments
+            self._cached_dict = data
+            self._cached_values = values
+            self._dirty = False
+        data = self._cached_dict
+        # разобранные сообщения и вложения можно изменить на месте, не трогая саму заявку,
+        # поэтому их запись обновляется при каждом сохранении — одинаково для всех форматов
+        if self._history is not None:
+            data["history"] = _objects_record(self._history)
+        if self._attachments is not None:
+            data["attachments"] = _objects_record(self._attachments)
+        return data
+
+    @property
+    def history(self) -> List[Message]:
+        if self._history is None:
+            self._history = [Message.from_dict(m) for m in self._raw_history]
+            self._raw_history = None
+            # сохранённый словарь ссылается на прежний список словарей, а правки
+            # теперь попадают в объекты Message — словарь нужно пересобрать
+            self._dirty = True
+        return self._history
+
+    @history.setter
+    def history(self, value: List[Message]) -> None:
+        self._history = value
+        self._raw_history = None
+
+    @property
+    def attachments(self) -> List[Attachment]:
+        if self._attachments is None:
+            self._attachments = [Attachment.from_dict(a) for a in self._raw_attachments]
+            self._raw_attachments = None
+            self._dirty = True
+        return self._attachments
+
+    @attachments.setter
+    def attachments(self, value: List[Attachment]) -> None:
+        self._attachments = value
+        self._raw_attachments = None
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "ticket_id": self.ticket_id,
-            "device_type": self.device_type,
-            "device_model": self.device_model,
-            "problem_description": self.problem_description,
-            "client_name": self.client_name,
-            "client_phone": self.client_phone,
-            "status": self.status,
-            "priority": self.priority,
-            "ticket_type": self.ticket_type,
-            "operator_group": self.operator_group,
-            "responsible_operator": self.responsible_operator,
-            "observers": self.observers,
-            "assigned_master": self.assigned_master,
-            "history": [m.to_dict() for m in self.history],
-            "attachments": [a.to_dict() for a in self.attachments],
-            "requires_parts": self.requires_parts,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-            "report": self.report,
-            "notify_client": self.notify_client,
-        }
+        data = dict(zip(Ticket._FIELDS, Ticket._GETTER(self)))
+        # неразобранные списки уходят в JSON как были прочитаны
+        if self._history is None:
+            data["history"] = self._raw_history
+        else:
+            data["history"] = [m.to_dict() for m in self._history]
+        if self._attachments is None:
+            data["attachments"] = self._raw_attachments
+        else:
+            data["attachments"] = [a.to_dict() for a in self._attachments]
+        return data
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "Ticket":
-        return Ticket(
-            ticket_id=data["ticket_id"],
-            device_type=data["device_type"],
-            device_model=data["device_model"],
-            problem_description=data["problem_description"],
-            client_name=data["client_name"],
-            client_phone=data["client_phone"],
-            status=data.get("status", "Новая"),
-            priority=data.get("priority", "Средний"),
-            ticket_type=data.get("ticket_type", "Стандартная"),
-            operator_group=data.get("operator_group", ""),
-            responsible_operator=data.get("responsible_operator", ""),
-            observers=data.get("observers", []),
-            assigned_master=data.get("assigned_master", ""),
-            history=[Message.from_dict(m) for m in data.get("history", [])],
-            attachments=[Attachment.from_dict(a) for a in data.get("attachments", [])],
-            requires_parts=data.get("requires_parts", False),
-            created_at=data.get("created_at"),
-            updated_at=data.get("updated_at"),
-            report=data.get("report", ""),
-            notify_client=data.get("notify_client", False),
-        )
+        # одно слияние с умолчаниями вместо отдельного data.get на каждое поле;
+        # отсутствие обязательного поля по-прежнему даёт KeyError
+        merged = {**Ticket._DEFAULTS, **data}
+        kwargs = {key: merged[key] for key in _EAGER_FIELDS}
+        for key in _INTERNED_FIELDS:
+            value = kwargs[key]
+            if isinstance(value, str):
+                kwargs[key] = sys.intern(value)
+        ticket = Ticket(**kwargs)
+        # сообщения и вложения создаются при первом обращении к history/attachments
+        ticket._history = None
+        ticket._raw_history = merged["history"] or []
+        ticket._attachments = None
+        ticket._raw_attachments = merged["attachments"] or []
+        return ticket
 
     def add_message(self, message: Message) -> None:
         self.history.append(message)
-        self.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.updated_at = _now_minute()
+        self._dirty = True
 
     def add_attachment(self, attachment: Attachment) -> None:
         self.attachments.append(attachment)
-        self.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.updated_at = _now_minute()
+        self._dirty = True
+
+
+# Поля, которые Ticket.from_dict передаёт в конструктор сразу.
+_EAGER_FIELDS = tuple(key for key in Ticket._FIELDS if key not in _LAZY_FIELDS)
 
 
 class TicketSystem:
@@ -181,8 +447,84 @@ class TicketSystem:
         self.data = load_data()
         self.tickets: List[Ticket] = [Ticket.from_dict(t) for t in self.data.get("tickets", [])]
         self.next_id: int = self.data.get("next_id", 1)
+        # индекс заявок по номеру; список self.tickets и индекс меняются вместе (add_ticket/remove_ticket)
+        self._by_id: Dict[int, Ticket] = {t.ticket_id: t for t in self.tickets}
+        # хэш последнего записанного содержимого: одинаковые данные повторно не пишем
+        self._last_digest = b""
+        # в приложении Qt запись откладывается таймером, при выходе — сбрасывается на диск
+        self._save_timer = None
+        self._pending_write: Optional[Future] = None
+        app = QCoreApplication.instance() if QCoreApplication is not None else None
+        if app is not None:
+            self._save_timer = QTimer()
+            self._save_timer.setSingleShot(True)
+            self._save_timer.setInterval(SAVE_DELAY_MS)
+            self._save_timer.timeout.connect(self._save_now)
+            app.aboutToQuit.connect(self.flush)
+        if not os.path.exists(_data_path()) and any(os.path.exists(p) for p in _legacy_paths()):
+            # одноразовый перенос данных из прежнего формата (JSON, несжатый файл);
+            # старый файл остаётся как резервная копия
+            self._save_now()
+
+    def get(self, ticket_id: int) -> Optional[Ticket]:
+        """Заявка по номеру или None."""
+        return self._by_id.get(ticket_id)
+
+    def add_ticket(self, ticket: Ticket) -> None:
+        """Добавить заявку и сохранить данные."""
+        self.tickets.append(ticket)
+        self._by_id[ticket.ticket_id] = ticket
+        self.next_id = max(self.next_id, ticket.ticket_id + 1)
+        self._save()
+
+    def remove_ticket(self, ticket_id: int) -> Optional[Ticket]:
+        """Удалить заявку по номеру и сохранить данные; возвращает удалённую заявку или None."""
+        ticket = self._by_id.pop(ticket_id, None)
+        if ticket is None:
+            return None
+        self.tickets.remove(ticket)
+        self._save()
+        return ticket
+
+    def count_by(self, field: str) -> Dict[Any, int]:
+        """
+        Количество заявок по значению поля, например count_by("status") или count_by("priority").
+        Подсчёт идёт в Counter и attrgetter (оба на C), без цикла на Python.
+        """
+        return dict(Counter(map(attrgetter(field), self.tickets)))
 
     def _save(self) -> None:
-        self.data["tickets"] = [t.to_dict() for t in self.tickets]
+        """Сохранить данные: в приложении Qt — через SAVE_DELAY_MS после последнего вызова."""
+        if self._save_timer is None:
+            self._save_now()
+        else:
+            self._save_timer.start()
+
+    def flush(self) -> None:
+        """Немедленно записать отложенные изменения."""
+        if self._save_timer is not None and self._save_timer.isActive():
+            self._save_timer.stop()
+        self._save_now()
+        if self._pending_write is not None:
+            self._pending_write.result()
+
+    def _save_now(self) -> None:
+        self.data["tickets"] = [t.serialized() for t in self.tickets]
         self.data["next_id"] = self.next_id
-        save_data(self.data)
+        payload = _dumps(self.data)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        if digest == self._last_digest:
+            return
+        if self._save_timer is None:
+            _write_atomic(payload)
+            self._last_digest = digest
+            return
+        self._last_digest = digest
+        # в GUI данные уже сериализованы в этом потоке, на диск их пишет фоновый поток
+        self._pending_write = _WRITER.submit(_write_atomic, payload)
+        self._pending_write.add_done_callback(self._on_write_done)
+
+    def _on_write_done(self, future: Future) -> None:
+        if future.exception() is not None:
+            # запись не удалась — следующий _save должен записать те же данные снова
+            self._last_digest = b""